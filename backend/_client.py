@@ -0,0 +1,129 @@
+"""
+_client.py - Shared Gemini client for the AR Designer Kit backend
+
+Every backend module imports the client from here, so the process keeps one
+HTTP connection pool per transport (sync and async) instead of one per module,
+and a warm TLS session is reused by every call.
+
+The blocking wrappers run their coroutines on one long-lived background event
+loop, which gets an async client of its own: httpx keep-alive connections
+belong to the loop that opened them, so that loop must never share a pool with
+the loops callers await the a* functions on.
+
+Usage:
+    from _client import client, get_aclient, run_sync
+"""
+
+from google import genai
+from google.genai import types
+from typing import Optional
+import asyncio
+import httpx
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Keep enough idle connections for the concurrent async helpers, and keep
+# them open between demo/batch steps
+_POOL_LIMITS = httpx.Limits(
+    max_keepalive_connections=32,
+    max_connections=64,
+    keepalive_expiry=60,
+)
+
+# Request timeout in milliseconds. 4K Nano Banana Pro generations can take
+# well over a minute, so this is wider than a typical API timeout.
+REQUEST_TIMEOUT_MS = 120_000
+
+def _new_client() -> genai.Client:
+    """Create a client with the shared timeout and pool limits."""
+    return genai.Client(  # Picks up GEMINI_API_KEY from environment
+        http_options=types.HttpOptions(
+            timeout=REQUEST_TIMEOUT_MS,
+            client_args={"limits": _POOL_LIMITS},
+            async_client_args={"limits": _POOL_LIMITS},
+        ),
+    )
+
+client = _new_client()
+aclient = client.aio
+
+# Used only on the background loop behind run_sync()
+_sync_loop_aclient = _new_client().aio
+_sync_loop: Optional[asyncio.AbstractEventLoop] = None
+_sync_loop_lock = threading.Lock()
+
+def _background_loop() -> asyncio.AbstractEventLoop:
+    """Return the event loop used by the blocking wrappers, starting it on first use."""
+    global _sync_loop
+    with _sync_loop_lock:
+        if _sync_loop is None:
+            _sync_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_sync_loop.run_forever,
+                name="nano-fun-loop",
+                daemon=True,
+            ).start()
+    return _sync_loop
+
+def get_aclient() -> genai.client.AsyncClient:
+    """Return the async client for the running event loop.
+
+    Coroutines running under run_sync() get the background loop's own client;
+    everything else shares aclient.
+    """
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is not None and running is _sync_loop:
+        return _sync_loop_aclient
+    return aclient
+
+def run_sync(coro):
+    """Run a coroutine to completion from synchronous code.
+
+    Every blocking wrapper shares one long-lived background loop instead of
+    calling asyncio.run() per call, so its client's connection pool always
+    belongs to a live loop.
+
+    Args:
+        coro: Coroutine to execute
+
+    Returns:
+        The coroutine's result
+    """
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        # Blocking here would deadlock the loop the coroutine needs to run on
+        coro.close()
+        raise RuntimeError("Blocking wrappers can't be called from async code; await the a* variant instead")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+def _warm_up_connection():
+    """Open the TLS connection to Gemini with a cheap request."""
+    try:
+        client.models.list(config={"page_size": 1})
+    except Exception as e:
+        logger.debug("Gemini connection warm-up failed: %s", e)
+
+async def awarm_up():
+    """Open the async client's connection to Gemini ahead of the first request.
+
+    Call on application startup (e.g. asyncio.create_task(awarm_up())) so the
+    first real async call doesn't pay for the TLS handshake. Warms the client
+    of the loop it runs on.
+    """
+    try:
+        await get_aclient().models.list(config={"page_size": 1})
+    except Exception as e:
+        logger.debug("Gemini connection warm-up failed: %s", e)
+
+# Establish the sync client's connection in the background so the first
+# request doesn't pay for the TLS handshake
+threading.Thread(target=_warm_up_connection, name="gemini-warmup", daemon=True).start()
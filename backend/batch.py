@@ -0,0 +1,280 @@
+"""
+batch.py - Gemini Batch API entry points for AR Designer Kit
+
+Bulk, non-interactive workloads (e.g. generating floor plans or product
+recommendations for every room in a property inventory) can be submitted as a
+single Gemini batch job instead of one request per room. Batch jobs are billed
+at half the interactive rate and don't count against the per-minute quota, but
+are queued server-side and can take minutes to hours to finish.
+
+Requests are written as a JSONL file in the REST GenerateContentRequest format,
+uploaded through the Files API, and results are mapped back to inputs by key.
+
+Usage:
+    from batch import generate_floor_plan_batch, get_product_recommendations_batch
+
+    plans = generate_floor_plan_batch([load_image("living.jpg"), load_image("bed.jpg")])
+    recs = get_product_recommendations_batch([analysis_a, analysis_b], budget="high")
+"""
+
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import base64
+import json
+import logging
+
+from google.genai import types
+from PIL import Image
+import pydantic
+
+from _client import get_aclient, run_sync
+from nano_fun import (
+    FloorPlan,
+    FLOOR_PLAN_CONFIG,
+    Models,
+    ProductRecommendation,
+    RECOMMENDATION_CONFIG,
+    RecognizedObject,
+    RoomAnalysis,
+    as_part,
+    await_batch,
+    floor_plan_prompt,
+    parse_floor_plan,
+    parse_recommendations,
+    recommendation_prompt,
+)
+
+try:
+    # Optional, as in nano_fun: parses the result lines several times faster
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
+
+# ============================================================================
+# Request Serialization
+# ============================================================================
+
+def _rest(obj: Any) -> Any:
+    """Dump an SDK type as REST JSON (camelCase keys, unset fields dropped)."""
+    return obj.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+def _rest_part(item: Any) -> Dict[str, Any]:
+    """Dump a prompt string or Part, base64-encoding inline data.
+
+    Pydantic's bytes serializer emits URL-safe base64, while the REST API
+    expects the standard alphabet, so inline data is encoded here.
+    """
+    if isinstance(item, str):
+        return {"text": item}
+    if item.inline_data is not None:
+        return {"inlineData": {
+            "mimeType": item.inline_data.mime_type,
+            "data": base64.b64encode(item.inline_data.data).decode("ascii"),
+        }}
+    return _rest(item)
+
+# response_schema holds a Python type, which only the SDK's request path can
+# convert; the batch file carries the equivalent JSON Schema instead
+_GENERATION_FIELDS = frozenset(types.GenerationConfig.model_fields) - {"response_schema"}
+
+def _rest_request(
+    contents: List[Any],
+    config: types.GenerateContentConfig,
+) -> Dict[str, Any]:
+    """Build a REST GenerateContentRequest from contents and an SDK config.
+
+    The SDK flattens request-level fields (system instruction, tools) and
+    generation settings into one config; the batch file needs them split.
+
+    Args:
+        contents: Parts and strings for a single user turn
+        config: Config as used for the interactive call
+
+    Returns:
+        JSON-serializable request dict
+    """
+    request: Dict[str, Any] = {
+        "contents": [{"role": "user", "parts": [_rest_part(item) for item in contents]}],
+    }
+
+    if config.system_instruction:
+        request["systemInstruction"] = {"parts": [{"text": config.system_instruction}]}
+    if config.tools:
+        request["tools"] = [_rest(tool) for tool in config.tools]
+
+    generation = config.model_dump(include=_GENERATION_FIELDS, exclude_none=True)
+    generation_config = _rest(types.GenerationConfig(**generation)) if generation else {}
+    if config.response_schema is not None:
+        generation_config["responseJsonSchema"] = (
+            pydantic.TypeAdapter(config.response_schema).json_schema()
+        )
+    if generation_config:
+        request["generationConfig"] = generation_config
+
+    return request
+
+async def _floor_plan_request(
+    room_image: Image.Image,
+    recognized_objects: Optional[List[RecognizedObject]] = None,
+) -> Dict[str, Any]:
+    room_part = await asyncio.to_thread(as_part, room_image)
+    return _rest_request(
+        [room_part, floor_plan_prompt(recognized_objects)],
+        FLOOR_PLAN_CONFIG,
+    )
+
+async def _recommendation_request(
+    room_analysis: RoomAnalysis,
+    budget: str = "medium",
+    style: Optional[str] = None,
+    priorities: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    return _rest_request(
+        [recommendation_prompt(room_analysis, budget, style, priorities)],
+        RECOMMENDATION_CONFIG,
+    )
+
+@dataclass(slots=True, frozen=True)
+class _BatchSpec:
+    """How one batchable function builds requests and parses responses.
+
+    Attributes:
+        model: Model the batch job runs against
+        build: Async function taking the function's kwargs, returning a request
+        parse: Parser for the response text (also receives None on failure)
+    """
+    model: str
+    build: Callable[..., Awaitable[Dict[str, Any]]]
+    parse: Callable[[Optional[str]], Any]
+
+_BATCH_SPECS: Dict[str, _BatchSpec] = {
+    "generate_floor_plan": _BatchSpec(Models.PRO, _floor_plan_request, parse_floor_plan),
+    "get_product_recommendations": _BatchSpec(
+        Models.NANO_BANANA_PRO, _recommendation_request, parse_recommendations,
+    ),
+}
+
+# ============================================================================
+# Batch Runner
+# ============================================================================
+
+def _response_text(response: Dict[str, Any]) -> Optional[str]:
+    """Join the non-thought text parts of a REST GenerateContentResponse."""
+    return types.GenerateContentResponse.model_validate(response).text
+
+async def run_batch(fn_name: str, inputs: List[Dict[str, Any]]) -> List[Any]:
+    """Run a batchable function over many inputs as one Gemini batch job.
+
+    Args:
+        fn_name: "generate_floor_plan" or "get_product_recommendations"
+        inputs: Keyword arguments for each call of that function
+
+    Returns:
+        One result per input, in input order. Inputs whose request failed get
+        the same fallback the interactive function returns on a bad response.
+    """
+    spec = _BATCH_SPECS[fn_name]
+    if not inputs:
+        return []
+
+    requests = await asyncio.gather(*(spec.build(**kwargs) for kwargs in inputs))
+    jsonl = "\n".join(
+        json.dumps({"key": str(i), "request": request})
+        for i, request in enumerate(requests)
+    )
+
+    uploaded = await get_aclient().files.upload(
+        file=BytesIO(jsonl.encode("utf-8")),
+        config=types.UploadFileConfig(display_name=f"{fn_name}-batch", mime_type="jsonl"),
+    )
+    job = await get_aclient().batches.create(
+        model=spec.model,
+        src=uploaded.name,
+        config=types.CreateBatchJobConfig(display_name=f"{fn_name}-{len(inputs)}"),
+    )
+    job = await await_batch(job.name)
+
+    texts: List[Optional[str]] = [None] * len(inputs)
+    if job.state != types.JobState.JOB_STATE_SUCCEEDED:
+        logger.error("%s batch %s ended in state %s", fn_name, job.name, job.state)
+    else:
+        output = await get_aclient().files.download(file=job.dest.file_name)
+        for line in output.splitlines():
+            if not line.strip():
+                continue
+            result = _json_loads(line)
+            index = int(result["key"])
+            if "response" in result:
+                texts[index] = _response_text(result["response"])
+            else:
+                logger.warning("%s batch item %d failed: %s", fn_name, index, result.get("error"))
+
+    return [spec.parse(text) for text in texts]
+
+# ============================================================================
+# Entry Points
+# ============================================================================
+
+async def agenerate_floor_plan_batch(
+    room_images: List[Image.Image],
+    recognized_objects: Optional[List[Optional[List[RecognizedObject]]]] = None,
+) -> List[FloorPlan]:
+    """Async counterpart of generate_floor_plan_batch()."""
+    recognized_objects = recognized_objects or [None] * len(room_images)
+    return await run_batch("generate_floor_plan", [
+        {"room_image": image, "recognized_objects": objects}
+        for image, objects in zip(room_images, recognized_objects)
+    ])
+
+def generate_floor_plan_batch(
+    room_images: List[Image.Image],
+    recognized_objects: Optional[List[Optional[List[RecognizedObject]]]] = None,
+) -> List[FloorPlan]:
+    """
+    Generate floor plans for many rooms as a single batch job.
+
+    Args:
+        room_images: Photo of each room
+        recognized_objects: Optional pre-detected objects per room (same order)
+
+    Returns:
+        One FloorPlan per room, in input order
+    """
+    return run_sync(agenerate_floor_plan_batch(room_images, recognized_objects))
+
+async def aget_product_recommendations_batch(
+    room_analyses: List[RoomAnalysis],
+    budget: str = "medium",
+    style: Optional[str] = None,
+    priorities: Optional[List[str]] = None,
+) -> List[List[ProductRecommendation]]:
+    """Async counterpart of get_product_recommendations_batch()."""
+    return await run_batch("get_product_recommendations", [
+        {"room_analysis": analysis, "budget": budget, "style": style, "priorities": priorities}
+        for analysis in room_analyses
+    ])
+
+def get_product_recommendations_batch(
+    room_analyses: List[RoomAnalysis],
+    budget: str = "medium",
+    style: Optional[str] = None,
+    priorities: Optional[List[str]] = None,
+) -> List[List[ProductRecommendation]]:
+    """
+    Get product recommendations for many rooms as a single batch job.
+
+    Args:
+        room_analyses: Analysis of each room from analyze_room()
+        budget: "low", "medium", "high", or "luxury"
+        style: Preferred style override
+        priorities: List of priorities (e.g., ["comfort", "durability"])
+
+    Returns:
+        One recommendation list per room, in input order
+    """
+    return run_sync(aget_product_recommendations_batch(room_analyses, budget, style, priorities))
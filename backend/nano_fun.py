@@ -22,8 +22,14 @@ Models Available:
     - gemini-3-pro-image-preview (Nano Banana Pro): Advanced image generation with thinking
 
 Setup:
-    pip install google-genai pillow
+    pip install google-genai pillow numpy
+    pip install orjson  # optional, faster JSON parsing
     export GEMINI_API_KEY="your-api-key"
+    export AR_DESIGNER_SEMANTIC_CACHE=1  # optional, enable the semantic response cache
+    
+    # Optional: Pillow-SIMD is a drop-in Pillow build with SSE4/AVX2 resize,
+    # convert and codec paths (several times faster for the image utilities)
+    pip uninstall -y pillow && CC="cc -mavx2" pip install -U --force-reinstall pillow-simd
     
 Usage:
     from nano_fun import generate_image, edit_image, RoomEditingSession
@@ -39,6 +45,11 @@ Usage:
     img1, text1 = session.edit(room_photo, "Transform to modern style")
     img2, text2 = session.edit(None, "Make the sofa darker")
     
+    # From async code, await the a* variants instead
+    image, description = await agenerate_image("A modern living room with plants")
+    async_session = RoomEditingSession()
+    img3, text3 = await async_session.aedit(room_photo, "Add a reading lamp")
+    
     # Run examples
     python nano_fun.py --demo
 
@@ -46,22 +57,48 @@ Author: AR Designer Kit Team
 License: Copyright 2024
 """
 
-from google import genai
-from google.genai import types
+from google.genai import errors, types
 from PIL import Image
 from io import BytesIO
+import numpy as np
 from dataclasses import dataclass, field
 from typing import Optional, List, Dict, Any, Tuple
+from typing_extensions import TypedDict  # pydantic needs this one before Python 3.12
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing, asynccontextmanager
+from functools import lru_cache, wraps
+import asyncio
 import base64
+import hashlib
+import inspect
 import json
+import logging
+import os
+import random
+import re
+import threading
 import time
+import weakref
+
+from semantic_cache import Codec, semantic_cache
+
+try:
+    # orjson is optional; it parses the same payloads several times faster and
+    # its JSONDecodeError subclasses json.JSONDecodeError.
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+logger = logging.getLogger(__name__)
 
 # ============================================================================
 # Initialize Client
 # ============================================================================
 
-client = genai.Client()  # Picks up GEMINI_API_KEY from environment
+# One client (and connection pool) shared with the other backend modules
+from _client import awarm_up, client, get_aclient, run_sync
 
 # ============================================================================
 # Models
@@ -75,6 +112,7 @@ class Models:
         PRO: Advanced reasoning model (gemini-2.5-pro)
         NANO_BANANA: Fast image generation model (gemini-2.5-flash-image)
         NANO_BANANA_PRO: Advanced image generation with thinking (gemini-3-pro-image-preview)
+        EMBEDDING: Text embeddings for the semantic response cache (gemini-embedding-001)
     """
     # Text + Vision (no image generation)
     FLASH = "gemini-2.5-flash"
@@ -83,12 +121,15 @@ class Models:
     # Native Image Generation (Nano Banana)
     NANO_BANANA = "gemini-2.5-flash-image"           # Fast image gen/editing
     NANO_BANANA_PRO = "gemini-3-pro-image-preview"   # Advanced, thinking, 14 ref images
+    
+    # Embeddings
+    EMBEDDING = "gemini-embedding-001"
 
 # ============================================================================
 # Data Classes
 # ============================================================================
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class BoundingBox:
     """Normalized bounding box coordinates (0-1 range).
     
@@ -103,7 +144,7 @@ class BoundingBox:
     max_x: float
     max_y: float
 
-@dataclass
+@dataclass(slots=True)
 class RecognizedObject:
     """Detected object in an image with location and classification.
     
@@ -118,7 +159,138 @@ class RecognizedObject:
     bounding_box: BoundingBox
     category: str  # 'architectural', 'furniture', 'fixture', 'other'
 
+OBJECT_CATEGORIES = ("architectural", "furniture", "fixture", "other")
+_CATEGORY_CODES = {name: code for code, name in enumerate(OBJECT_CATEGORIES)}
+
 @dataclass
+class RecognizedObjectsSoA:
+    """Recognized objects stored column-wise (structure of arrays).
+    
+    Row i of every array describes the same detection. Geometry helpers run
+    as single NumPy passes instead of walking RecognizedObject instances.
+    Values are kept as float64 and categories as codes into category_names,
+    so to_list() gives back exactly what recognize_objects() returns.
+    
+    Attributes:
+        labels: Object names, one per detection
+        confidences: float64 array of shape (N,)
+        bboxes: float64 array of shape (N, 4) as (min_x, min_y, max_x, max_y)
+        categories: uint8 array of shape (N,) indexing category_names
+        category_names: OBJECT_CATEGORIES, followed by any other category
+            strings the model returned (e.g. "lighting")
+    """
+    labels: List[str]
+    confidences: np.ndarray
+    bboxes: np.ndarray
+    categories: np.ndarray
+    category_names: Tuple[str, ...] = OBJECT_CATEGORIES
+    
+    @classmethod
+    def from_dicts(cls, data: List[Dict[str, Any]]) -> "RecognizedObjectsSoA":
+        """Build from raw detection dicts as returned by the model."""
+        bboxes = np.array(
+            [
+                [bbox.get(key, default) for key, default in _BBOX_DEFAULTS]
+                for bbox in (obj.get("bounding_box") or {} for obj in data)
+            ],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+        codes = dict(_CATEGORY_CODES)
+        categories = np.array(
+            [codes.setdefault(obj.get("category", "other"), len(codes)) for obj in data],
+            dtype=np.uint8,
+        )
+        return cls(
+            labels=[obj.get("label", "unknown") for obj in data],
+            confidences=np.array(
+                [obj.get("confidence", 0) for obj in data], dtype=np.float64
+            ),
+            bboxes=bboxes,
+            categories=categories,
+            category_names=tuple(codes),
+        )
+    
+    def __len__(self) -> int:
+        return len(self.labels)
+    
+    def __eq__(self, other) -> bool:
+        # The generated __eq__ would call bool() on element-wise array results
+        if not isinstance(other, RecognizedObjectsSoA):
+            return NotImplemented
+        return (
+            self.labels == other.labels
+            and self.category_names == other.category_names
+            and np.array_equal(self.confidences, other.confidences)
+            and np.array_equal(self.bboxes, other.bboxes)
+            and np.array_equal(self.categories, other.categories)
+        )
+    
+    def take(self, indices: np.ndarray) -> "RecognizedObjectsSoA":
+        """Return the detections at the given indices, in that order."""
+        return RecognizedObjectsSoA(
+            labels=[self.labels[i] for i in indices],
+            confidences=self.confidences[indices],
+            bboxes=self.bboxes[indices],
+            categories=self.categories[indices],
+            category_names=self.category_names,
+        )
+    
+    def areas(self) -> np.ndarray:
+        """Normalized box areas, shape (N,)."""
+        widths = np.clip(self.bboxes[:, 2] - self.bboxes[:, 0], 0, None)
+        heights = np.clip(self.bboxes[:, 3] - self.bboxes[:, 1], 0, None)
+        return widths * heights
+    
+    def iou(self) -> np.ndarray:
+        """Pairwise intersection-over-union matrix, shape (N, N)."""
+        b = self.bboxes
+        min_xy = np.maximum(b[:, None, :2], b[None, :, :2])
+        max_xy = np.minimum(b[:, None, 2:], b[None, :, 2:])
+        inter = np.prod(np.clip(max_xy - min_xy, 0, None), axis=2)
+        areas = self.areas()
+        union = areas[:, None] + areas[None, :] - inter
+        return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+    
+    def sorted_by_confidence(self) -> "RecognizedObjectsSoA":
+        """Return the detections ordered from most to least confident."""
+        return self.take(np.argsort(-self.confidences, kind="stable"))
+    
+    def non_max_suppression(self, iou_threshold: float = 0.5) -> "RecognizedObjectsSoA":
+        """Drop detections overlapping a more confident one of the same category.
+        
+        Args:
+            iou_threshold: Overlap above which the less confident box is dropped
+        
+        Returns:
+            Surviving detections, most confident first
+        """
+        order = np.argsort(-self.confidences, kind="stable")
+        overlaps = self.iou()
+        same_category = self.categories[:, None] == self.categories[None, :]
+        suppressed = np.zeros(len(self), dtype=bool)
+        keep = []
+        for i in order:
+            if suppressed[i]:
+                continue
+            keep.append(i)
+            suppressed |= (overlaps[i] > iou_threshold) & same_category[i]
+        return self.take(np.array(keep, dtype=np.intp))
+    
+    def to_list(self) -> List[RecognizedObject]:
+        """Convert back to a list of RecognizedObject."""
+        return [
+            RecognizedObject(
+                label=label,
+                confidence=float(confidence),
+                bounding_box=BoundingBox(*map(float, bbox)),
+                category=self.category_names[code],
+            )
+            for label, confidence, bbox, code in zip(
+                self.labels, self.confidences, self.bboxes, self.categories
+            )
+        ]
+
+@dataclass(slots=True, frozen=True)
 class RoomDimensions:
     """Estimated room dimensions in meters.
     
@@ -156,29 +328,53 @@ class StyleVariation:
         id: Unique identifier for this variation
         name: Human-readable name
         description: Detailed description of the style
-        image: Generated PIL Image (optional)
+        image: Generated image (optional)
     """
     id: str
     name: str
     description: str
-    image: Optional[Image.Image] = None
+    image: Optional["LazyImage"] = None
 
 @dataclass
 class FloorPlan:
     """2D floor plan data extracted from room image.
     
+    Geometry is stored as float32 (N, 4) arrays, one row per element, so
+    downstream passes (lengths, bounds, rendering) run vectorized.
+    
     Attributes:
-        walls: List of wall segments with start/end coordinates
-        doors: List of door positions with width and angle
-        windows: List of window positions with dimensions
+        walls: Wall segments, columns (start_x, start_y, end_x, end_y) in meters
+        doors: Doors, columns (x, y, width, angle) in meters/degrees
+        windows: Windows, columns (x, y, width, height) in meters
         dimensions: Overall room dimensions in meters
     """
-    walls: List[Dict[str, Any]]
-    doors: List[Dict[str, Any]]
-    windows: List[Dict[str, Any]]
+    walls: np.ndarray
+    doors: np.ndarray
+    windows: np.ndarray
     dimensions: Dict[str, float]
+    
+    @classmethod
+    def empty(cls) -> "FloorPlan":
+        """Floor plan with no geometry, used when parsing fails."""
+        none = np.empty((0, 4), dtype=np.float32)
+        return cls(none, none.copy(), none.copy(), {"width": 0, "length": 0})
+    
+    def __eq__(self, other) -> bool:
+        # The generated __eq__ would call bool() on element-wise array results
+        if not isinstance(other, FloorPlan):
+            return NotImplemented
+        return (
+            np.array_equal(self.walls, other.walls)
+            and np.array_equal(self.doors, other.doors)
+            and np.array_equal(self.windows, other.windows)
+            and self.dimensions == other.dimensions
+        )
+    
+    def wall_lengths(self) -> np.ndarray:
+        """Length of each wall segment in meters."""
+        return np.hypot(self.walls[:, 2] - self.walls[:, 0], self.walls[:, 3] - self.walls[:, 1])
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ProductRecommendation:
     """Furniture or decor product recommendation.
     
@@ -201,30 +397,219 @@ class ProductRecommendation:
 # Image Utilities
 # ============================================================================
 
-def load_image(path: str) -> Image.Image:
+# Encoded image formats Gemini returns, with the file extensions they map to
+_MIME_EXTENSIONS = {
+    "image/png": (".png",),
+    "image/jpeg": (".jpg", ".jpeg"),
+    "image/webp": (".webp",),
+}
+
+class LazyImage:
+    """A generated image kept as its encoded bytes until pixels are needed.
+    
+    Stands in for the google.genai types.Image that part.as_image() returns,
+    which already decodes lazily and saves its raw bytes, so plain saving is
+    no faster than before. What the wrapper adds: PIL attributes and methods
+    (size, convert, resize, ...) work directly, through a PIL Image decoded
+    once on first use; code that needs the bytes or a Gemini Part (as_part,
+    single_flight, the semantic cache) uses them without decoding; and it
+    keeps the types.Image surface (image_bytes, mime_type, model_dump()).
+    
+    Attributes:
+        data: Encoded image bytes as returned by the API
+        mime_type: MIME type of data (e.g. "image/png")
+    """
+    __slots__ = ("data", "mime_type", "_pil")
+    
+    def __init__(self, data: bytes, mime_type: Optional[str] = None):
+        self.data = data
+        self.mime_type = mime_type or "image/png"
+        self._pil: Optional[Image.Image] = None
+    
+    @property
+    def image_bytes(self) -> bytes:
+        """The encoded bytes (types.Image.image_bytes)."""
+        return self.data
+    
+    def as_genai_image(self) -> types.Image:
+        """Return the equivalent google.genai types.Image."""
+        return types.Image(image_bytes=self.data, mime_type=self.mime_type)
+    
+    def model_dump(self, **kwargs) -> Dict[str, Any]:
+        """Dump like types.Image.model_dump()."""
+        return self.as_genai_image().model_dump(**kwargs)
+    
+    @property
+    def pil(self) -> Image.Image:
+        """The decoded PIL Image (decoded on first access)."""
+        if self._pil is None:
+            image = Image.open(BytesIO(self.data))
+            image.load()
+            self._pil = image
+        return self._pil
+    
+    def save(self, fp, format: Optional[str] = None, **params):
+        """Save like Image.save, writing the encoded bytes when they already match.
+        
+        Encoder options are irrelevant when nothing is re-encoded, so they are
+        only applied on the PIL fallback path.
+        """
+        if isinstance(fp, (str, os.PathLike)):
+            extensions = _MIME_EXTENSIONS.get(self.mime_type, ())
+            same_format = format is None or f"image/{format.lower()}" == self.mime_type
+            if same_format and os.fspath(fp).lower().endswith(extensions):
+                with open(fp, "wb") as f:
+                    f.write(self.data)
+                return
+        self.pil.save(fp, format, **params)
+    
+    def __getattr__(self, name: str):
+        # Only reached for names the wrapper lacks. Private and dunder lookups
+        # (copy/pickle probing __deepcopy__, __reduce_ex__ or an unset _pil on
+        # an instance built without __init__) must not decode or recurse.
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.pil, name)
+    
+    def __getstate__(self) -> Tuple[bytes, str]:
+        # The encoded bytes are the whole image; decoded pixels are re-derived
+        return self.data, self.mime_type
+    
+    def __setstate__(self, state: Tuple[bytes, str]):
+        self.data, self.mime_type = state
+        self._pil = None
+    
+    def __repr__(self) -> str:
+        return f"<LazyImage {self.mime_type} {len(self.data)} bytes>"
+
+def load_image(path: str, max_edge: Optional[int] = None) -> Image.Image:
     """Load an image from file path.
     
+    With max_edge set, JPEGs are decoded through libjpeg's DCT scaling
+    (Image.draft) at the smallest 1/2, 1/4 or 1/8 scale that still covers
+    max_edge, then resized down in place. This is much faster than decoding
+    a full-resolution phone photo only to shrink it for the model.
+    
     Args:
         path: File path to image
+        max_edge: Optional maximum length of the longest side in pixels
         
     Returns:
         PIL Image object
     """
-    return Image.open(path)
+    image = Image.open(path)
+    if max_edge:
+        image.draft("RGB", (max_edge, max_edge))
+        image.load()
+        image.thumbnail((max_edge, max_edge), Image.Resampling.LANCZOS)
+    return image
+
+_buffer_pool = threading.local()
 
-def image_to_bytes(image: Image.Image, format: str = "PNG") -> bytes:
+# Encoders that only ever write forward, so a reused buffer's stale tail is
+# never read back. Others (ICO, PDF, TIFF, ...) seek back into or size the
+# stream and get a fresh buffer.
+_POOLED_FORMATS = frozenset({"PNG", "JPEG", "WEBP"})
+
+def image_to_bytes(
+    image: Image.Image,
+    format: str = "PNG",
+    **save_options: Any,
+) -> bytes:
     """Convert PIL Image to bytes.
     
     Args:
         image: PIL Image to convert
         format: Output format (PNG, JPEG, etc.)
+        **save_options: Encoder options passed to Image.save (e.g. quality)
         
     Returns:
         Image data as bytes
     """
-    buffer = BytesIO()
-    image.save(buffer, format=format)
-    return buffer.getvalue()
+    if format.upper() not in _POOLED_FORMATS:
+        buffer = BytesIO()
+        image.save(buffer, format=format, **save_options)
+        return buffer.getvalue()
+    
+    # Reuse a per-thread buffer that stays at its high-water size instead of
+    # growing a fresh BytesIO from empty on every call. These encoders write
+    # sequentially, so the stream position marks the end of the data. (Not
+    # truncated: BytesIO.truncate() frees the allocation we want to keep.)
+    buffer = getattr(_buffer_pool, "buffer", None)
+    if buffer is None:
+        buffer = _buffer_pool.buffer = BytesIO()
+    buffer.seek(0)
+    image.save(buffer, format=format, **save_options)
+    size = buffer.tell()
+    with buffer.getbuffer() as view:
+        return view[:size].tobytes()
+
+def as_part(
+    image: Image.Image,
+    fmt: str = "JPEG",
+    quality: int = 92,
+) -> types.Part:
+    """Encode a PIL Image once into a reusable request Part.
+    
+    Passing a PIL Image straight to the SDK re-encodes it as PNG on every
+    request. Encoding once and reusing the Part avoids that, and JPEG keeps
+    photographic content several times smaller on the wire.
+    
+    Args:
+        image: PIL Image to encode
+        fmt: Output format (JPEG, PNG, etc.)
+        quality: JPEG quality (ignored for lossless formats)
+        
+    Returns:
+        types.Part holding the encoded image bytes
+    """
+    fmt = fmt.upper()
+    if isinstance(image, LazyImage) and image.mime_type == f"image/{fmt.lower()}":
+        # Sending a generated image back as-is: it is already encoded
+        return types.Part.from_bytes(data=image.data, mime_type=image.mime_type)
+    if fmt == "JPEG":
+        if image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        # Single-pass baseline encode: Huffman optimization and progressive
+        # scans add encoder passes for a few percent of size we don't need.
+        data = image_to_bytes(
+            image,
+            format=fmt,
+            quality=quality,
+            optimize=False,
+            progressive=False,
+        )
+    else:
+        data = image_to_bytes(image, format=fmt)
+    return types.Part.from_bytes(data=data, mime_type=f"image/{fmt.lower()}")
+
+def _prep_for_vision(
+    image: Image.Image,
+    max_edge: int = 1024,
+    quality: int = 88,
+) -> types.Part:
+    """Downscale and JPEG-encode an image for a vision request.
+    
+    Gemini tokenizes images at a fixed effective resolution, so anything
+    beyond ~1024 px on the long edge only costs upload time and encoder CPU.
+    The caller's image is left untouched.
+    
+    Args:
+        image: PIL Image to prepare
+        max_edge: Maximum length of the longest side in pixels
+        quality: JPEG quality
+        
+    Returns:
+        types.Part holding the resized JPEG
+    """
+    width, height = image.size
+    if max(width, height) > max_edge:
+        scale = max_edge / max(width, height)
+        image = image.resize(
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            Image.Resampling.LANCZOS,
+        )
+    return as_part(image, "JPEG", quality)
 
 def bytes_to_image(data: bytes) -> Image.Image:
     """Convert bytes to PIL Image.
@@ -237,19 +622,514 @@ def bytes_to_image(data: bytes) -> Image.Image:
     """
     return Image.open(BytesIO(data))
 
-def save_image(image: Image.Image, path: str):
-    """Save PIL Image to file.
+def save_image(image: Image.Image, path: str, **save_options):
+    """Save an image to file.
     
     Args:
-        image: PIL Image to save
+        image: PIL Image, or a LazyImage from a response
         path: Output file path
+        **save_options: Encoder options (e.g. compress_level=1); a LazyImage
+            saved in its own format is written as its encoded bytes instead
+    """
+    image.save(path, **save_options)
+
+# ============================================================================
+# Async Helpers
+# ============================================================================
+
+# HTTP status codes worth retrying: rate limiting and overload, where the
+# request was rejected before any work was done. 500/504 are not retried: the
+# generation may have run (and been billed) anyway.
+_RETRYABLE_STATUS = {429, 503}
+
+def _is_transient(exc: Exception) -> bool:
+    """Return True if an API error is a rate limit or an overloaded server."""
+    return isinstance(exc, errors.APIError) and exc.code in _RETRYABLE_STATUS
+
+def _with_retry(fn, max_tries: int = 4, base: float = 0.5):
+    """Wrap an API call with bounded exponential backoff on transient errors.
+    
+    Works for both regular and async callables. Non-transient errors and the
+    final failed attempt are re-raised unchanged.
+    
+    Args:
+        fn: Function or coroutine function to wrap
+        max_tries: Total number of attempts
+        base: Initial backoff in seconds (doubled per attempt, plus jitter)
+        
+    Returns:
+        Wrapped callable with the same signature
+    """
+    def delay(attempt: int) -> float:
+        return base * (2 ** attempt) + random.random() * 0.1
+    
+    if inspect.iscoroutinefunction(fn):
+        @wraps(fn)
+        async def async_wrapper(*args, **kwargs):
+            for attempt in range(max_tries):
+                try:
+                    return await fn(*args, **kwargs)
+                except errors.APIError as e:
+                    if not _is_transient(e) or attempt == max_tries - 1:
+                        raise
+                    await asyncio.sleep(delay(attempt))
+        return async_wrapper
+    
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        for attempt in range(max_tries):
+            try:
+                return fn(*args, **kwargs)
+            except errors.APIError as e:
+                if not _is_transient(e) or attempt == max_tries - 1:
+                    raise
+                time.sleep(delay(attempt))
+    return wrapper
+
+# Arguments compared by value; anything else is compared by identity
+_VALUE_TYPES = (str, bytes, int, float, bool, type(None))
+
+def _flight_key(value: Any) -> Any:
+    """Reduce a call argument to a hashable key for single_flight.
+    
+    Primitives compare by value and LazyImages by a hash of their encoded
+    bytes; lists, tuples and dicts are keyed element-wise. Every other object
+    (PIL images, dataclasses, ...) is keyed by id(), which is safe because
+    the in-flight call keeps it alive.
+    """
+    if isinstance(value, _VALUE_TYPES):
+        return type(value), value
+    if isinstance(value, LazyImage):
+        return LazyImage, value.mime_type, hashlib.blake2b(value.data, digest_size=16).digest()
+    if isinstance(value, (list, tuple)):
+        return type(value), tuple(_flight_key(item) for item in value)
+    if isinstance(value, dict):
+        return dict, tuple((_flight_key(k), _flight_key(v)) for k, v in value.items())
+    return id, id(value)
+
+def single_flight(fn):
+    """Coalesce concurrent identical calls of an async function into one.
+    
+    Calls are identical when every bound argument has the same _flight_key:
+    equal primitives, LazyImages with the same bytes, or the very same
+    object otherwise (so the same PIL image, but not an equal copy of it).
+    The first caller starts the work as a task; callers arriving while it is
+    in flight await the same task. A cancelled caller doesn't cancel the
+    shared work for the others.
+    
+    Args:
+        fn: Coroutine function to wrap
+        
+    Returns:
+        Wrapped coroutine function with the same signature
+    """
+    signature = inspect.signature(fn)
+    inflight: Dict[Tuple[asyncio.AbstractEventLoop, Any], asyncio.Future] = {}
+    
+    @wraps(fn)
+    async def wrapper(*args, **kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        arguments = tuple((name, _flight_key(value)) for name, value in bound.arguments.items())
+        # Tasks are bound to their loop (sync wrappers and callers may use different ones)
+        key = (asyncio.get_running_loop(), arguments)
+        
+        task = inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn(*args, **kwargs))
+            inflight[key] = task
+            
+            def done(finished: asyncio.Future):
+                if inflight.get(key) is finished:
+                    del inflight[key]
+                # Mark the exception retrieved in case every caller was cancelled
+                if not finished.cancelled():
+                    finished.exception()
+            
+            task.add_done_callback(done)
+        
+        return await asyncio.shield(task)
+    
+    return wrapper
+
+# Requests and tokens per minute allowed by the active Gemini tier. In-flight
+# requests are additionally capped at one second's worth of the request budget.
+GEMINI_QPM = 300
+GEMINI_TPM = 1_000_000
+
+class GeminiLimiter:
+    """Proactive requests/tokens-per-minute throttle for Gemini calls.
+    
+    Two token buckets refill continuously at rpm/60 and tpm/60 per second.
+    acquire() waits until both can cover a request, so bursts are smoothed out
+    before they turn into 429 responses. Buckets are refilled lazily on each
+    acquire, so the limiter can be shared between threads and event loops.
+    
+    Example:
+        >>> limiter = GeminiLimiter(rpm=60, tpm=100_000)
+        >>> async with limiter.acquire(est_tokens=500):
+        ...     response = await aclient.models.generate_content(...)
+    """
+    
+    def __init__(self, rpm: int, tpm: int):
+        """Create a limiter.
+        
+        Args:
+            rpm: Requests allowed per minute
+            tpm: Input tokens allowed per minute
+        """
+        self.rpm = rpm
+        self.tpm = tpm
+        self._requests = float(rpm)
+        self._tokens = float(tpm)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _try_take(self, tokens: int) -> float:
+        """Take capacity for one request if available.
+        
+        Returns:
+            0 if capacity was taken, otherwise seconds until it should be
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._updated = now
+            self._requests = min(self.rpm, self._requests + elapsed * self.rpm / 60)
+            self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+            
+            # A request larger than the whole bucket only waits for a full one
+            tokens = min(tokens, self.tpm)
+            if self._requests >= 1 and self._tokens >= tokens:
+                self._requests -= 1
+                self._tokens -= tokens
+                return 0.0
+            return max(
+                (1 - self._requests) * 60 / self.rpm,
+                (tokens - self._tokens) * 60 / self.tpm,
+            )
+    
+    @asynccontextmanager
+    async def acquire(self, est_tokens: int = 0):
+        """Wait until a request of est_tokens input tokens fits the budget."""
+        while (wait := self._try_take(est_tokens)) > 0:
+            await asyncio.sleep(wait)
+        yield
+
+gemini_limiter = GeminiLimiter(rpm=GEMINI_QPM, tpm=GEMINI_TPM)
+
+# Gemini bills each input image tile as 258 tokens
+_IMAGE_TOKEN_ESTIMATE = 258
+
+def _estimate_tokens(contents: Any) -> int:
+    """Roughly estimate the input tokens of a request (~4 characters per token)."""
+    if not isinstance(contents, (list, tuple)):
+        contents = [contents]
+    return sum(
+        len(item) // 4 if isinstance(item, str) else _IMAGE_TOKEN_ESTIMATE
+        for item in contents
+    )
+
+_concurrency_limits: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = (
+    weakref.WeakKeyDictionary()
+)
+
+def _gemini_slot() -> asyncio.Semaphore:
+    """Return the in-flight request limiter for the running event loop."""
+    loop = asyncio.get_running_loop()
+    semaphore = _concurrency_limits.get(loop)
+    if semaphore is None:
+        semaphore = _concurrency_limits[loop] = asyncio.Semaphore(max(1, GEMINI_QPM // 60))
+    return semaphore
+
+async def _agenerate_once(**kwargs) -> types.GenerateContentResponse:
+    """Call aclient.models.generate_content within the rate and concurrency limits.
+    
+    Args:
+        **kwargs: Arguments for generate_content (model, contents, config)
+        
+    Returns:
+        The model response
+    """
+    async with gemini_limiter.acquire(est_tokens=_estimate_tokens(kwargs.get("contents"))):
+        async with _gemini_slot():
+            return await get_aclient().models.generate_content(**kwargs)
+
+# Every async generate_content call site goes through here. The limiter keeps
+# us under quota up front, so only a few retries are needed for what slips by.
+_agenerate = _with_retry(_agenerate_once, max_tries=3)
+
+_BATCH_TERMINAL_STATES = {
+    types.JobState.JOB_STATE_SUCCEEDED,
+    types.JobState.JOB_STATE_FAILED,
+    types.JobState.JOB_STATE_CANCELLED,
+    types.JobState.JOB_STATE_EXPIRED,
+}
+
+async def await_batch(
+    name: str,
+    initial_delay: float = 5.0,
+    max_delay: float = 30.0,
+) -> types.BatchJob:
+    """Poll a Gemini batch job until it reaches a terminal state.
+    
+    Args:
+        name: Batch job resource name
+        initial_delay: First polling interval in seconds
+        max_delay: Upper bound for the exponentially growing interval
+    
+    Returns:
+        The finished BatchJob
+    """
+    delay = initial_delay
+    while True:
+        job = await get_aclient().batches.get(name=name)
+        if job.state in _BATCH_TERMINAL_STATES:
+            return job
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
+
+# ============================================================================
+# Request Configs
+# ============================================================================
+
+# Object recognition needs no reasoning, only fast structured output
+_NO_THINKING = types.ThinkingConfig(thinking_budget=0)
+
+# Gemini 3 Pro models always think and reject thinking_budget=0; the lowest
+# level keeps the hidden reasoning phase (and time to first token) short
+_LOW_THINKING = types.ThinkingConfig(thinking_level=types.ThinkingLevel.LOW)
+
+@lru_cache(maxsize=32)
+def _img_gen_config(
+    aspect_ratio: Optional[str],
+    resolution: Optional[str] = None,
+    search: bool = False,
+    system_instruction: Optional[str] = None,
+    low_thinking: bool = False,
+    image_only: bool = False,
+) -> types.GenerateContentConfig:
+    """Build the config for an image-generating request, once per combination.
+    
+    The returned config is shared between calls, so treat it as read-only.
+    
+    Args:
+        aspect_ratio: Output aspect ratio, or None for the model default
+        resolution: "1K", "2K" or "4K" (Pro model only), or None
+        search: Enable Google Search grounding
+        system_instruction: Optional static instructions sent ahead of the prompt
+        low_thinking: Minimize thinking (Nano Banana Pro requests only)
+        image_only: Request only the image, for callers that discard the text
+        
+    Returns:
+        Cached GenerateContentConfig
+    """
+    image_config = None
+    if aspect_ratio or resolution:
+        image_config = types.ImageConfig(aspect_ratio=aspect_ratio, image_size=resolution)
+    return types.GenerateContentConfig(
+        response_modalities=["IMAGE"] if image_only else ["TEXT", "IMAGE"],
+        image_config=image_config,
+        tools=[{"google_search": {}}] if search else None,
+        system_instruction=system_instruction,
+        thinking_config=_LOW_THINKING if low_thinking else None,
+    )
+
+# ============================================================================
+# Prompt Caching
+# ============================================================================
+
+# The texture and floor-plan preambles (~150 tokens) are far below the
+# explicit CachedContent minimum (1024-4096 tokens), so they are sent as the
+# system instruction instead. Gemini's implicit caching discounts a repeated
+# prompt prefix, and the system instruction is always sent first.
+
+def _log_cache_usage(response: types.GenerateContentResponse, label: str):
+    """Log how many prompt tokens were served from the implicit prompt cache."""
+    usage = response.usage_metadata
+    if usage is not None:
+        logger.debug(
+            "%s: %s of %s prompt tokens cached",
+            label,
+            usage.cached_content_token_count or 0,
+            usage.prompt_token_count,
+        )
+
+# ============================================================================
+# Response Helpers
+# ============================================================================
+
+def _extract_image_and_text(
+    response: types.GenerateContentResponse,
+    decode: bool = True,
+) -> Tuple[Optional[LazyImage], str]:
+    """Pull the generated image and text out of a response in one pass.
+    
+    Thinking parts (Nano Banana Pro) are skipped and only the first image is
+    decoded; text parts are concatenated in order.
+    
+    Args:
+        response: Response (or stream chunk) from generate_content or a chat send_message
+        decode: Set False to skip image parts, e.g. once a stream already yielded one
+        
+    Returns:
+        Tuple of (image or None, text)
+    """
+    image = None
+    text_parts = []
+    
+    for part in response.parts or ():
+        if getattr(part, "thought", False):
+            continue
+        if part.inline_data is not None:
+            if decode and image is None:
+                image = LazyImage(part.inline_data.data, part.inline_data.mime_type)
+        elif part.text is not None:
+            text_parts.append(part.text)
+    
+    return image, "".join(text_parts)
+
+def _first_image(response: types.GenerateContentResponse) -> Optional[LazyImage]:
+    """Return the first generated image in a response without touching its text.
+    
+    Interim thought images (Nano Banana Pro with thinking) are skipped.
+    """
+    part = next(
+        (
+            part for part in response.parts or ()
+            if part.inline_data is not None and not getattr(part, "thought", False)
+        ),
+        None,
+    )
+    if part is None:
+        return None
+    return LazyImage(part.inline_data.data, part.inline_data.mime_type)
+
+async def _astream_image_once(
+    stop_at_image: bool = False,
+    **kwargs,
+) -> Tuple[Optional[LazyImage], str, Optional[types.GenerateContentResponse]]:
+    """Stream an image-generating request, collecting parts as chunks arrive.
+    
+    Text and thinking chunks are handled while the image is still being
+    generated, and the image is decoded from the chunk that carries it. The
+    whole stream is consumed inside the rate and concurrency limits so a retry
+    always restarts from a clean request.
+    
+    Args:
+        stop_at_image: Close the stream as soon as the image arrives and skip
+            text collection (for callers that only want the image)
+        **kwargs: Arguments for generate_content_stream (model, contents, config)
+        
+    Returns:
+        Tuple of (image or None, text, last chunk with usage/grounding metadata)
     """
-    image.save(path)
+    image = None
+    text_parts = []
+    last_chunk = None
+    
+    async with gemini_limiter.acquire(est_tokens=_estimate_tokens(kwargs.get("contents"))):
+        async with _gemini_slot():
+            stream = await get_aclient().models.generate_content_stream(**kwargs)
+            async with aclosing(stream):
+                async for chunk in stream:
+                    last_chunk = chunk
+                    if stop_at_image:
+                        image = _first_image(chunk)
+                        if image is not None:
+                            break
+                        continue
+                    chunk_image, chunk_text = _extract_image_and_text(chunk, decode=image is None)
+                    if image is None:
+                        image = chunk_image
+                    text_parts.append(chunk_text)
+    
+    return image, "".join(text_parts), last_chunk
+
+_astream_image = _with_retry(_astream_image_once, max_tries=3)
+
+# ============================================================================
+# Semantic Response Cache
+# ============================================================================
+
+async def _aembed(text: str) -> np.ndarray:
+    """Embed a prompt for semantic cache lookups (counted against the rate limits)."""
+    async with gemini_limiter.acquire(est_tokens=_estimate_tokens(text)):
+        response = await get_aclient().models.embed_content(model=Models.EMBEDDING, contents=text)
+    return np.asarray(response.embeddings[0].values, dtype=np.float32)
+
+def _dump_image(image: LazyImage, base_path: str) -> Tuple[str, Dict[str, Any]]:
+    """Write a generated image's encoded bytes to disk."""
+    path = base_path + _MIME_EXTENSIONS.get(image.mime_type, (".bin",))[0]
+    with open(path, "wb") as f:
+        f.write(image.data)
+    return path, {"mime_type": image.mime_type}
+
+def _load_image(path: str, metadata: Dict[str, Any]) -> LazyImage:
+    """Read a cached image back as the LazyImage the generators return."""
+    with open(path, "rb") as f:
+        return LazyImage(f.read(), metadata["mime_type"])
+
+def _dump_optional_image(image: Any, base_path: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    # Nothing generated, nothing to cache
+    return None if image is None else _dump_image(image, base_path)
+
+def _dump_image_text(result: Tuple[Any, str], base_path: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+    # The description is kept in the metadata next to the image
+    image, text = result
+    if image is None:
+        return None
+    path, metadata = _dump_image(image, base_path)
+    metadata["text"] = text
+    return path, metadata
+
+# Bare image results (textures)
+_IMAGE_CODEC = Codec(dump=_dump_optional_image, load=_load_image)
+
+# (image, description) results
+
+_IMAGE_TEXT_CODEC = Codec(
+    dump=_dump_image_text,
+    load=lambda path, metadata: (_load_image(path, metadata), metadata["text"]),
+)
 
 # ============================================================================
 # Object Recognition
 # ============================================================================
 
+_RECOGNITION_PROMPT = """You are an expert architectural and interior design feature detector.
+Analyze this room image and identify ALL visible objects and architectural features.
+
+For each detected item, provide a JSON array with objects containing:
+- label: specific name (e.g., "wall", "floor", "ceiling", "window", "door", "sofa", "table")
+- confidence: 0.0 to 1.0 based on detection certainty
+- bounding_box: {min_x, min_y, max_x, max_y} as normalized coordinates (0-1)
+- category: one of "architectural", "furniture", "fixture", "other"
+
+Categories:
+- architectural: walls, floors, ceilings, columns, beams, stairs
+- furniture: tables, chairs, sofas, beds, desks, shelves, cabinets
+- fixture: windows, doors, outlets, switches, vents, built-in lighting
+- other: plants, decorations, artwork, rugs, curtains
+
+Return ONLY a valid JSON array."""
+
+_RECOGNITION_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    thinking_config=_NO_THINKING,
+)
+
+_BBOX_DEFAULTS = (("min_x", 0), ("min_y", 0), ("max_x", 1), ("max_y", 1))
+
+def _bounding_box(bbox: Optional[Dict[str, float]]) -> BoundingBox:
+    """Build a BoundingBox from a model response dict, defaulting missing edges."""
+    try:
+        # Fast path: well-formed responses carry all four edges
+        return BoundingBox(bbox["min_x"], bbox["min_y"], bbox["max_x"], bbox["max_y"])
+    except (KeyError, TypeError):
+        bbox = bbox or {}
+        return BoundingBox(*(bbox.get(key, default) for key, default in _BBOX_DEFAULTS))
+
 def recognize_objects(
     image: Image.Image,
     min_confidence: float = 0.5
@@ -272,58 +1152,87 @@ def recognize_objects(
         >>> for obj in objects:
         ...     print(f"{obj.label}: {obj.confidence:.2f}")
     """
-    prompt = """You are an expert architectural and interior design feature detector.
-Analyze this room image and identify ALL visible objects and architectural features.
-
-For each detected item, provide a JSON array with objects containing:
-- label: specific name (e.g., "wall", "floor", "ceiling", "window", "door", "sofa", "table")
-- confidence: 0.0 to 1.0 based on detection certainty
-- bounding_box: {min_x, min_y, max_x, max_y} as normalized coordinates (0-1)
-- category: one of "architectural", "furniture", "fixture", "other"
-
-Categories:
-- architectural: walls, floors, ceilings, columns, beams, stairs
-- furniture: tables, chairs, sofas, beds, desks, shelves, cabinets
-- fixture: windows, doors, outlets, switches, vents, built-in lighting
-- other: plants, decorations, artwork, rugs, curtains
+    return [
+        RecognizedObject(
+            label=obj.get("label", "unknown"),
+            confidence=obj.get("confidence", 0),
+            bounding_box=_bounding_box(obj.get("bounding_box")),
+            category=obj.get("category", "other"),
+        )
+        for obj in _detect_objects(image, min_confidence)
+    ]
 
-Return ONLY a valid JSON array."""
+def recognize_objects_soa(
+    image: Image.Image,
+    min_confidence: float = 0.5
+) -> RecognizedObjectsSoA:
+    """Recognize objects and return them as column-wise NumPy arrays.
+    
+    Same detection as recognize_objects(), but no per-object dataclasses are
+    created, so bulk geometry (areas, IoU, NMS) runs vectorized.
+    
+    Args:
+        image: PIL Image to analyze
+        min_confidence: Minimum confidence threshold (0-1)
+    
+    Returns:
+        RecognizedObjectsSoA holding all detections
+        
+    Example:
+        >>> objects = recognize_objects_soa(image).non_max_suppression(0.5)
+        >>> largest = objects.labels[int(objects.areas().argmax())]
+    """
+    return RecognizedObjectsSoA.from_dicts(_detect_objects(image, min_confidence))
 
+def _detect_objects(image: Image.Image, min_confidence: float) -> List[Dict[str, Any]]:
+    """Run object detection and return the raw detections above the threshold."""
     response = client.models.generate_content(
         model=Models.FLASH,
-        contents=[prompt, image],
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            thinking_config=types.ThinkingConfig(thinking_budget=0),
-        ),
+        contents=[_RECOGNITION_PROMPT, _prep_for_vision(image)],
+        config=_RECOGNITION_CONFIG,
     )
     
     try:
-        data = json.loads(response.text)
-        objects = []
-        for obj in data:
-            if obj.get("confidence", 0) >= min_confidence:
-                bbox = obj.get("bounding_box", {})
-                objects.append(RecognizedObject(
-                    label=obj.get("label", "unknown"),
-                    confidence=obj.get("confidence", 0),
-                    bounding_box=BoundingBox(
-                        min_x=bbox.get("min_x", 0),
-                        min_y=bbox.get("min_y", 0),
-                        max_x=bbox.get("max_x", 1),
-                        max_y=bbox.get("max_y", 1),
-                    ),
-                    category=obj.get("category", "other"),
-                ))
-        return objects
+        data = _json_loads(response.text)
     except json.JSONDecodeError:
-        print(f"Failed to parse response: {response.text}")
+        logger.error("Failed to parse response: %s", response.text)
         return []
+    
+    # Threshold all confidences in one vectorized pass so callers only build
+    # records for the survivors
+    confidences = np.fromiter(
+        (obj.get("confidence", 0) for obj in data),
+        dtype=np.float64,
+        count=len(data),
+    )
+    return [data[i] for i in np.flatnonzero(confidences >= min_confidence)]
 
 # ============================================================================
 # Room Analysis
 # ============================================================================
 
+_ANALYSIS_PROMPT = """You are an expert interior designer and architect.
+Analyze this room image and provide a JSON object with:
+
+{
+    "room_type": "living room/bedroom/kitchen/etc",
+    "dimensions": {
+        "estimated_width": <meters>,
+        "estimated_length": <meters>,
+        "estimated_height": <meters>
+    },
+    "lighting_suggestions": ["suggestion1", "suggestion2", ...],
+    "style_recommendations": ["style1", "style2", ...],
+    "detected_features": ["feature1", "feature2", ...]
+}
+
+Return ONLY valid JSON."""
+
+_ANALYSIS_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    thinking_config=types.ThinkingConfig(thinking_budget=128),
+)
+
 def analyze_room(image: Image.Image) -> RoomAnalysis:
     """Analyze a room image for design recommendations.
     
@@ -343,34 +1252,15 @@ def analyze_room(image: Image.Image) -> RoomAnalysis:
         >>> print(f"Size: {analysis.dimensions.estimated_width}m x {analysis.dimensions.estimated_length}m")
         >>> print(f"Styles: {', '.join(analysis.style_recommendations)}")
     """
-    prompt = """You are an expert interior designer and architect.
-Analyze this room image and provide a JSON object with:
-
-{
-    "room_type": "living room/bedroom/kitchen/etc",
-    "dimensions": {
-        "estimated_width": <meters>,
-        "estimated_length": <meters>,
-        "estimated_height": <meters>
-    },
-    "lighting_suggestions": ["suggestion1", "suggestion2", ...],
-    "style_recommendations": ["style1", "style2", ...],
-    "detected_features": ["feature1", "feature2", ...]
-}
-
-Return ONLY valid JSON."""
 
     response = client.models.generate_content(
         model=Models.FLASH,
-        contents=[prompt, image],
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            thinking_config=types.ThinkingConfig(thinking_budget=128),
-        ),
+        contents=[_ANALYSIS_PROMPT, _prep_for_vision(image)],
+        config=_ANALYSIS_CONFIG,
     )
     
     try:
-        data = json.loads(response.text)
+        data = _json_loads(response.text)
         dims = data.get("dimensions", {})
         return RoomAnalysis(
             room_type=data.get("room_type", "unknown"),
@@ -384,7 +1274,7 @@ Return ONLY valid JSON."""
             detected_features=data.get("detected_features", []),
         )
     except json.JSONDecodeError:
-        print(f"Failed to parse response: {response.text}")
+        logger.error("Failed to parse response: %s", response.text)
         return RoomAnalysis(
             room_type="unknown",
             dimensions=RoomDimensions(0, 0, 0),
@@ -397,11 +1287,27 @@ Return ONLY valid JSON."""
 # Image Generation (Text-to-Image)
 # ============================================================================
 
+@single_flight
+@semantic_cache(embed=_aembed, codec=_IMAGE_TEXT_CODEC)
+async def agenerate_image(
+    prompt: str,
+    aspect_ratio: str = "16:9",
+    model: str = Models.NANO_BANANA,
+) -> Tuple[Optional[LazyImage], str]:
+    """Async counterpart of generate_image()."""
+    response = await _agenerate(
+        model=model,
+        contents=[prompt],
+        config=_img_gen_config(aspect_ratio),
+    )
+    
+    return _extract_image_and_text(response)
+
 def generate_image(
     prompt: str,
     aspect_ratio: str = "16:9",
     model: str = Models.NANO_BANANA,
-) -> Tuple[Optional[Image.Image], str]:
+) -> Tuple[Optional[LazyImage], str]:
     """Generate an image from a text prompt using Nano Banana.
     
     Creates a new image based on text description. Supports various aspect ratios
@@ -413,7 +1319,7 @@ def generate_image(
         model: NANO_BANANA (fast) or NANO_BANANA_PRO (quality)
     
     Returns:
-        Tuple of (PIL Image or None, description text)
+        Tuple of (LazyImage or None, description text)
         
     Example:
         >>> image, desc = generate_image(
@@ -423,27 +1329,7 @@ def generate_image(
         >>> if image:
         ...     image.save("bedroom.png")
     """
-    response = client.models.generate_content(
-        model=model,
-        contents=[prompt],
-        config=types.GenerateContentConfig(
-            response_modalities=["TEXT", "IMAGE"],
-            image_config=types.ImageConfig(
-                aspect_ratio=aspect_ratio,
-            ),
-        ),
-    )
-    
-    image = None
-    description = ""
-    
-    for part in response.parts:
-        if part.text is not None:
-            description = part.text
-        elif part.inline_data is not None:
-            image = part.as_image()
-    
-    return image, description
+    return run_sync(agenerate_image(prompt, aspect_ratio, model))
 
 # ============================================================================
 # Image Editing (Image-to-Image)
@@ -454,7 +1340,7 @@ def edit_image(
     edit_prompt: str,
     aspect_ratio: str = "16:9",
     model: str = Models.NANO_BANANA,
-) -> Tuple[Optional[Image.Image], str]:
+) -> Tuple[Optional[LazyImage], str]:
     """Edit an existing image based on a text prompt.
     
     Modifies an input image according to text instructions while preserving
@@ -467,7 +1353,7 @@ def edit_image(
         model: NANO_BANANA (fast) or NANO_BANANA_PRO (quality)
     
     Returns:
-        Tuple of (edited PIL Image or None, description text)
+        Tuple of (edited LazyImage or None, description text)
         
     Example:
         >>> original = load_image("room.jpg")
@@ -480,37 +1366,35 @@ def edit_image(
     """
     response = client.models.generate_content(
         model=model,
-        contents=[image, edit_prompt],
-        config=types.GenerateContentConfig(
-            response_modalities=["TEXT", "IMAGE"],
-            image_config=types.ImageConfig(
-                aspect_ratio=aspect_ratio,
-            ),
-        ),
+        contents=[_prep_for_vision(image), edit_prompt],
+        config=_img_gen_config(aspect_ratio),
     )
     
-    result_image = None
-    description = ""
-    
-    for part in response.parts:
-        if part.text is not None:
-            description = part.text
-        elif part.inline_data is not None:
-            result_image = part.as_image()
-    
-    return result_image, description
+    return _extract_image_and_text(response)
 
 # ============================================================================
 # Room Style Generation
 # ============================================================================
 
+# Invariant text goes before the style so repeated requests share a prefix
+_STYLE_GUIDELINES = """Transform this room image according to the style given below.
+
+Important guidelines:
+- Preserve the room's basic structure and layout
+- Change materials, colors, textures, and decor to match the style
+- Maintain realistic lighting that matches the new materials
+- Keep the same camera angle and perspective
+- Make it look like a professional interior design visualization
+
+Style: """
+
 def generate_room_style(
     room_image: Image.Image,
     style_prompt: str,
     aspect_ratio: str = "16:9",
     resolution: str = "2K",
     use_pro: bool = False,
-) -> Tuple[Optional[Image.Image], str]:
+) -> Tuple[Optional[LazyImage], str]:
     """Transform a room image with a new interior design style.
     
     Applies a complete style transformation to a room photo while preserving
@@ -537,51 +1421,18 @@ def generate_room_style(
         >>> if styled:
         ...     styled.save("living_room_scandinavian.jpg")
     """
-    enhanced_prompt = f"""Transform this room image according to the following style:
-{style_prompt}
-
-Important guidelines:
-- Preserve the room's basic structure and layout
-- Change materials, colors, textures, and decor to match the style
-- Maintain realistic lighting that matches the new materials
-- Keep the same camera angle and perspective
-- Make it look like a professional interior design visualization"""
+    enhanced_prompt = _STYLE_GUIDELINES + style_prompt
 
     model = Models.NANO_BANANA_PRO if use_pro else Models.NANO_BANANA
     
-    config_dict = {
-        "response_modalities": ["TEXT", "IMAGE"],
-        "image_config": types.ImageConfig(
-            aspect_ratio=aspect_ratio,
-        ),
-    }
-    
-    # Add resolution for Pro model
-    if use_pro:
-        config_dict["image_config"] = types.ImageConfig(
-            aspect_ratio=aspect_ratio,
-            image_size=resolution,
-        )
-    
     response = client.models.generate_content(
         model=model,
-        contents=[room_image, enhanced_prompt],
-        config=types.GenerateContentConfig(**config_dict),
+        contents=[as_part(room_image), enhanced_prompt],
+        # Resolution is only supported by the Pro model
+        config=_img_gen_config(aspect_ratio, resolution if use_pro else None),
     )
     
-    result_image = None
-    description = ""
-    
-    for part in response.parts:
-        # Skip thinking parts (Pro model)
-        if hasattr(part, 'thought') and part.thought:
-            continue
-        if part.text is not None:
-            description = part.text
-        elif part.inline_data is not None:
-            result_image = part.as_image()
-    
-    return result_image, description
+    return _extract_image_and_text(response)
 
 # ============================================================================
 # Style Variations
@@ -595,6 +1446,93 @@ STYLE_MODIFIERS = [
     {"id": "bright", "name": "Bright & Airy", "modifier": "with light colors, open feel, and maximum natural light"},
 ]
 
+def _variation_prompt(base_style: str, modifier: Dict[str, str]) -> str:
+    """Build the generation prompt for one style variation."""
+    return f"""Create a professional interior design visualization of this room that:
+- Preserves the room's structure
+- Applies the style consistently throughout
+- Looks realistic and achievable
+
+Transform this room with a {base_style} style, {modifier['modifier']}."""
+
+async def _generate_variation_async(
+    room_part: types.Part,
+    base_style: str,
+    modifier: Dict[str, str],
+    resolution: str,
+) -> Tuple[Optional[LazyImage], str]:
+    """Generate a single style variation with the async client.
+    
+    Args:
+        room_part: Pre-encoded room photo (see as_part)
+        base_style: Base style to apply
+        modifier: Entry from STYLE_MODIFIERS
+        resolution: Output resolution
+    
+    Returns:
+        Tuple of (variation image or None, description)
+    """
+    response = await _agenerate(
+        model=Models.NANO_BANANA_PRO,
+        contents=[room_part, _variation_prompt(base_style, modifier)],
+        config=_img_gen_config("16:9", resolution),
+    )
+    
+    return _extract_image_and_text(response)
+
+async def agenerate_style_variations(
+    room_image: Image.Image,
+    base_style: str,
+    num_variations: int = 3,
+    resolution: str = "2K",
+) -> List[StyleVariation]:
+    """Generate multiple style variations of a room concurrently.
+    
+    Async counterpart of generate_style_variations(). All variations are
+    requested at once, so total latency is that of the slowest single call
+    rather than the sum of all of them.
+    
+    Args:
+        room_image: Original room photo
+        base_style: Base style to apply (e.g., "modern", "rustic")
+        num_variations: Number of variations to generate (1-5)
+        resolution: Output resolution
+    
+    Returns:
+        List of StyleVariation objects with images
+        
+    Example:
+        >>> variations = await agenerate_style_variations(room, "modern")
+    """
+    selected_modifiers = STYLE_MODIFIERS[:min(num_variations, 5)]
+    # Encode off the event loop so concurrent callers aren't blocked on Pillow
+    room_part = await asyncio.to_thread(as_part, room_image)
+    
+    results = await asyncio.gather(
+        *[
+            _generate_variation_async(room_part, base_style, modifier, resolution)
+            for modifier in selected_modifiers
+        ],
+        return_exceptions=True,
+    )
+    
+    variations = []
+    for modifier, result in zip(selected_modifiers, results):
+        if isinstance(result, Exception):
+            logger.warning("Failed to generate variation %s: %s", modifier["id"], result)
+            continue
+        
+        result_image, description = result
+        if result_image:
+            variations.append(StyleVariation(
+                id=modifier["id"],
+                name=modifier["name"],
+                description=description or f"{base_style} {modifier['modifier']}",
+                image=result_image,
+            ))
+    
+    return variations
+
 def generate_style_variations(
     room_image: Image.Image,
     base_style: str,
@@ -605,6 +1543,7 @@ def generate_style_variations(
     
     Creates several different interpretations of a base style, each with
     unique characteristics (warm/cool tones, natural/luxurious, etc.).
+    Variations are generated concurrently (see agenerate_style_variations).
     
     Args:
         room_image: Original room photo
@@ -627,54 +1566,100 @@ def generate_style_variations(
         ...     var.image.save(f"bedroom_{var.id}.jpg")
         ...     print(f"{var.name}: {var.description}")
     """
-    variations = []
+    return run_sync(agenerate_style_variations(
+        room_image,
+        base_style,
+        num_variations=num_variations,
+        resolution=resolution,
+    ))
+
+async def agenerate_style_variations_batch(
+    room_image: Image.Image,
+    base_style: str,
+    num_variations: int = 5,
+    resolution: str = "2K",
+) -> List[StyleVariation]:
+    """Generate style variations as a single Gemini Batch API job.
+    
+    All variation prompts are submitted together as inline requests against
+    one encoded copy of the room image. Batch jobs are queued server-side and
+    can take minutes to complete, so use this for offline or bulk work and
+    agenerate_style_variations() for interactive requests.
+    
+    Args:
+        room_image: Original room photo
+        base_style: Base style to apply (e.g., "modern", "rustic")
+        num_variations: Number of variations to generate (1-5)
+        resolution: Output resolution
+    
+    Returns:
+        List of StyleVariation objects with images
+    """
     selected_modifiers = STYLE_MODIFIERS[:min(num_variations, 5)]
+    room_part = await asyncio.to_thread(as_part, room_image)
+    config = _img_gen_config("16:9", resolution)
     
-    for modifier in selected_modifiers:
-        full_prompt = f"""Transform this room with a {base_style} style, {modifier['modifier']}.
-
-Create a professional interior design visualization that:
-- Preserves the room's structure
-- Applies the style consistently throughout
-- Looks realistic and achievable"""
-
-        try:
-            response = client.models.generate_content(
-                model=Models.NANO_BANANA_PRO,
-                contents=[room_image, full_prompt],
-                config=types.GenerateContentConfig(
-                    response_modalities=["TEXT", "IMAGE"],
-                    image_config=types.ImageConfig(
-                        aspect_ratio="16:9",
-                        image_size=resolution,
-                    ),
-                ),
+    job = await get_aclient().batches.create(
+        model=Models.NANO_BANANA_PRO,
+        src=[
+            types.InlinedRequest(
+                contents=[room_part, _variation_prompt(base_style, modifier)],
+                config=config,
             )
-            
-            result_image = None
-            description = ""
-            
-            for part in response.parts:
-                if hasattr(part, 'thought') and part.thought:
-                    continue
-                if part.text is not None:
-                    description = part.text
-                elif part.inline_data is not None:
-                    result_image = part.as_image()
-            
-            if result_image:
-                variations.append(StyleVariation(
-                    id=modifier["id"],
-                    name=modifier["name"],
-                    description=description or f"{base_style} {modifier['modifier']}",
-                    image=result_image,
-                ))
-                
-        except Exception as e:
-            print(f"Failed to generate variation {modifier['id']}: {e}")
+            for modifier in selected_modifiers
+        ],
+        config=types.CreateBatchJobConfig(display_name=f"style-variations-{base_style}"),
+    )
+    job = await await_batch(job.name)
+    
+    if job.state != types.JobState.JOB_STATE_SUCCEEDED:
+        logger.error("Style variation batch %s ended in state %s", job.name, job.state)
+        return []
+    
+    variations = []
+    for modifier, inlined in zip(selected_modifiers, job.dest.inlined_responses):
+        if inlined.error is not None or inlined.response is None:
+            logger.warning("Failed to generate variation %s: %s", modifier["id"], inlined.error)
+            continue
+        
+        result_image, description = _extract_image_and_text(inlined.response)
+        
+        if result_image:
+            variations.append(StyleVariation(
+                id=modifier["id"],
+                name=modifier["name"],
+                description=description or f"{base_style} {modifier['modifier']}",
+                image=result_image,
+            ))
     
     return variations
 
+def generate_style_variations_batch(
+    room_image: Image.Image,
+    base_style: str,
+    num_variations: int = 5,
+    resolution: str = "2K",
+) -> List[StyleVariation]:
+    """Generate style variations as a single Gemini Batch API job.
+    
+    Blocking wrapper around agenerate_style_variations_batch().
+    
+    Args:
+        room_image: Original room photo
+        base_style: Base style to apply (e.g., "modern", "rustic")
+        num_variations: Number of variations to generate (1-5)
+        resolution: Output resolution
+    
+    Returns:
+        List of StyleVariation objects with images
+    """
+    return run_sync(agenerate_style_variations_batch(
+        room_image,
+        base_style,
+        num_variations=num_variations,
+        resolution=resolution,
+    ))
+
 # ============================================================================
 # Multi-Turn Chat Editing (Iterative Refinement)
 # ============================================================================
@@ -684,10 +1669,14 @@ class RoomEditingSession:
     
     Maintains conversation context across multiple edits, allowing for
     natural back-and-forth refinement of room designs without re-uploading
-    images each time.
+    images each time. edit() continues the conversation in the sync chat and
+    aedit() the one in achat, so use one of them per session to keep a
+    single conversation.
     
     Attributes:
-        chat: The underlying chat session
+        chat: The underlying chat session (used by edit())
+        achat: The underlying async chat session (used by aedit()), bound to
+            the running event loop's client
         history: List of edit operations performed
     
     Example:
@@ -701,6 +1690,9 @@ class RoomEditingSession:
         >>> 
         >>> # Add new reference image
         >>> img3, text3 = session.edit(reference_img, "Apply the color scheme from this image")
+        >>> 
+        >>> # Or, from async code (in a session of its own)
+        >>> img4, text4 = await session.aedit(room_image, "Make the lighting warmer")
     """
     
     def __init__(self, enable_search: bool = True):
@@ -709,20 +1701,69 @@ class RoomEditingSession:
         Args:
             enable_search: Enable Google Search grounding for product suggestions
         """
-        config = types.GenerateContentConfig(
-            response_modalities=["TEXT", "IMAGE"],
-        )
-        if enable_search:
-            config = types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],
-                tools=[{"google_search": {}}],
+        self._config = _img_gen_config(None, search=enable_search)
+        self.chat = client.chats.create(model=Models.NANO_BANANA_PRO, config=self._config)
+        self._achat = None
+        self._achat_client = None
+        self.history = []
+    
+    @property
+    def achat(self):
+        """The async chat, created on first use with the running loop's client.
+        
+        Connections belong to the loop that opened them, so if the session is
+        later awaited on a loop with a different client, the conversation so
+        far moves to a new chat on that client.
+        """
+        loop_client = get_aclient()
+        if self._achat_client is not loop_client:
+            history = self._achat.get_history() if self._achat is not None else []
+            self._achat = loop_client.chats.create(
+                model=Models.NANO_BANANA_PRO,
+                config=self._config,
+                history=history,
             )
+            self._achat_client = loop_client
+        return self._achat
+    
+    async def aedit(
+        self,
+        image: Optional[Image.Image],
+        prompt: str,
+        aspect_ratio: Optional[str] = None,
+        resolution: Optional[str] = None,
+    ) -> Tuple[Optional[LazyImage], str]:
+        """Send an edit request to the session without blocking the event loop.
         
-        self.chat = client.chats.create(
-            model=Models.NANO_BANANA_PRO,
-            config=config,
-        )
-        self.history = []
+        Args:
+            image: Optional new image to include (or None to continue editing)
+            prompt: Edit instructions
+            aspect_ratio: Optional output aspect ratio
+            resolution: Optional output resolution ("1K", "2K", "4K")
+        
+        Returns:
+            Tuple of (result image or None, response text)
+        """
+        # Build message parts, encoding any image off the event loop
+        parts = []
+        if image is not None:
+            parts.append(await asyncio.to_thread(as_part, image))
+        parts.append(prompt)
+        
+        # Send message, overriding the output format only if requested
+        if aspect_ratio or resolution:
+            response = await self.achat.send_message(
+                parts,
+                config=_img_gen_config(aspect_ratio, resolution),
+            )
+        else:
+            response = await self.achat.send_message(parts)
+        
+        result_image, text = _extract_image_and_text(response)
+        
+        self.history.append({"prompt": prompt, "has_image": image is not None})
+        
+        return result_image, text
     
     def edit(
         self,
@@ -730,7 +1771,7 @@ class RoomEditingSession:
         prompt: str,
         aspect_ratio: Optional[str] = None,
         resolution: Optional[str] = None,
-    ) -> Tuple[Optional[Image.Image], str]:
+    ) -> Tuple[Optional[LazyImage], str]:
         """Send an edit request to the session.
         
         Args:
@@ -745,38 +1786,19 @@ class RoomEditingSession:
         # Build message parts
         parts = []
         if image is not None:
-            parts.append(image)
+            parts.append(as_part(image))
         parts.append(prompt)
         
-        # Build config if needed
-        config = None
+        # Send message, overriding the output format only if requested
         if aspect_ratio or resolution:
-            image_config_dict = {}
-            if aspect_ratio:
-                image_config_dict["aspect_ratio"] = aspect_ratio
-            if resolution:
-                image_config_dict["image_size"] = resolution
-            config = types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],
-                image_config=types.ImageConfig(**image_config_dict),
+            response = self.chat.send_message(
+                parts,
+                config=_img_gen_config(aspect_ratio, resolution),
             )
-        
-        # Send message
-        if config:
-            response = self.chat.send_message(parts, config=config)
         else:
             response = self.chat.send_message(parts)
         
-        result_image = None
-        text = ""
-        
-        for part in response.parts:
-            if hasattr(part, 'thought') and part.thought:
-                continue
-            if part.text is not None:
-                text += part.text
-            elif part.inline_data is not None:
-                result_image = part.as_image()
+        result_image, text = _extract_image_and_text(response)
         
         self.history.append({"prompt": prompt, "has_image": image is not None})
         
@@ -786,9 +1808,11 @@ class RoomEditingSession:
         """Get the chat history.
         
         Returns:
-            List of chat messages and responses
+            List of chat messages and responses (from achat if only aedit() was used)
         """
-        return self.chat.get_history()
+        if self._achat is None:
+            return self.chat.get_history()
+        return self.chat.get_history() or self._achat.get_history()
 
 # ============================================================================
 # Multi-Reference Image Compositing (Nano Banana Pro)
@@ -799,7 +1823,7 @@ def composite_with_references(
     reference_images: List[Image.Image],
     aspect_ratio: str = "16:9",
     resolution: str = "2K",
-) -> Tuple[Optional[Image.Image], str]:
+) -> Tuple[Optional[LazyImage], str]:
     """Generate an image using multiple reference images (up to 14).
     
     Powerful for combining elements from multiple sources, maintaining
@@ -824,57 +1848,31 @@ def composite_with_references(
         ...     resolution="2K"
         ... )
     """
-    if len(reference_images) > 14:
-        print("Warning: Maximum 14 reference images allowed, truncating")
+    num_refs = len(reference_images)
+    if num_refs > 14:
+        logger.warning("Maximum 14 reference images allowed, dropping %d", num_refs - 14)
         reference_images = reference_images[:14]
+        num_refs = 14
     
-    # Build contents: prompt first, then all images
-    contents = [prompt] + reference_images
+    # Build contents: prompt first, then all images. Pillow releases the GIL
+    # while encoding, so the references are encoded in parallel.
+    with ThreadPoolExecutor(max_workers=max(1, min(8, num_refs))) as pool:
+        parts = list(pool.map(lambda image: as_part(image, "JPEG", 88), reference_images))
+    contents = [prompt] + parts
     
     response = client.models.generate_content(
         model=Models.NANO_BANANA_PRO,
         contents=contents,
-        config=types.GenerateContentConfig(
-            response_modalities=["TEXT", "IMAGE"],
-            image_config=types.ImageConfig(
-                aspect_ratio=aspect_ratio,
-                image_size=resolution,
-            ),
-        ),
+        config=_img_gen_config(aspect_ratio, resolution),
     )
     
-    result_image = None
-    description = ""
-    
-    for part in response.parts:
-        if hasattr(part, 'thought') and part.thought:
-            continue
-        if part.text is not None:
-            description = part.text
-        elif part.inline_data is not None:
-            result_image = part.as_image()
-    
-    return result_image, description
+    return _extract_image_and_text(response)
 
 # ============================================================================
 # Seamless Texture Generation
 # ============================================================================
 
-def generate_seamless_texture(
-    material_description: str,
-    resolution: str = "2K",
-) -> Optional[Image.Image]:
-    """
-    Generate a seamless tileable texture.
-    
-    Args:
-        material_description: Description of the material (e.g., "oak hardwood floor", "white marble")
-        resolution: "1K", "2K", or "4K" (requires Pro model)
-    
-    Returns:
-        PIL Image of the seamless texture
-    """
-    prompt = f"""Create a seamless tileable texture for: {material_description}
+_TEXTURE_PREAMBLE = """You generate seamless tileable textures for interior design.
 
 Requirements:
 - Must be perfectly tileable (edges match when repeated)
@@ -884,141 +1882,283 @@ Requirements:
 - Even lighting with no visible seams
 - Square format"""
 
+@single_flight
+@semantic_cache(embed=_aembed, codec=_IMAGE_CODEC, prompt_arg="material_description")
+async def agenerate_seamless_texture(
+    material_description: str,
+    resolution: str = "2K",
+) -> Optional[LazyImage]:
+    """Async counterpart of generate_seamless_texture()."""
+    prompt = f"Create a seamless tileable texture for: {material_description}"
+
     # Use Pro model for resolution control, basic model otherwise
     if resolution in ["2K", "4K"]:
         # Pro model supports image_size
-        response = client.models.generate_content(
-            model=Models.NANO_BANANA_PRO,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],  # Always include TEXT
-                image_config=types.ImageConfig(
-                    aspect_ratio="1:1",
-                    image_size=resolution,
-                ),
-            ),
-        )
+        model = Models.NANO_BANANA_PRO
+        image_size = resolution
+        low_thinking = True
     else:
-        # Basic model - no image_size parameter
-        response = client.models.generate_content(
-            model=Models.NANO_BANANA,
-            contents=[prompt],
-            config=types.GenerateContentConfig(
-                response_modalities=["TEXT", "IMAGE"],  # Always include TEXT
-                image_config=types.ImageConfig(
-                    aspect_ratio="1:1",
-                ),
-            ),
-        )
+        # Basic model - no image_size parameter, and no thinking phase
+        model = Models.NANO_BANANA
+        image_size = None
+        low_thinking = False
     
-    for part in response.parts:
-        # Skip thinking parts
-        if hasattr(part, 'thought') and part.thought:
-            continue
-        if part.inline_data is not None:
-            return part.as_image()
+    image, _, last_chunk = await _astream_image(
+        stop_at_image=True,
+        model=model,
+        contents=[prompt],
+        config=_img_gen_config(
+            "1:1",
+            image_size,
+            low_thinking=low_thinking,
+            image_only=True,
+            system_instruction=_TEXTURE_PREAMBLE,
+        ),
+    )
+    if last_chunk is not None:
+        _log_cache_usage(last_chunk, "seamless texture")
     
-    return None
+    return image
+
+def generate_seamless_texture(
+    material_description: str,
+    resolution: str = "2K",
+) -> Optional[LazyImage]:
+    """
+    Generate a seamless tileable texture.
+    
+    Args:
+        material_description: Description of the material (e.g., "oak hardwood floor", "white marble")
+        resolution: "1K", "2K", or "4K" (requires Pro model)
+    
+    Returns:
+        LazyImage of the seamless texture, or None
+    """
+    return run_sync(agenerate_seamless_texture(material_description, resolution))
 
 # ============================================================================
 # Floor Plan Generation
 # ============================================================================
 
-def generate_floor_plan(
-    room_image: Image.Image,
-    recognized_objects: Optional[List[RecognizedObject]] = None,
-) -> FloorPlan:
+_FLOOR_PLAN_PREAMBLE = """You are an expert architect analyzing a room image to generate a 2D floor plan.
+
+Based on the image, generate a floor plan as JSON:
+{
+    "walls": [{"start": {"x": 0, "y": 0}, "end": {"x": 5, "y": 0}}, ...],
+    "doors": [{"position": {"x": 2, "y": 0}, "width": 0.9, "angle": 90}, ...],
+    "windows": [{"position": {"x": 3, "y": 0}, "width": 1.2, "height": 1.5}, ...],
+    "dimensions": {"width": 5.0, "length": 4.0}
+}
+
+All measurements in meters. Return ONLY valid JSON."""
+
+# Response schema mirroring the JSON layout in _FLOOR_PLAN_PREAMBLE
+class _Point(TypedDict):
+    x: float
+    y: float
+
+class _Wall(TypedDict):
+    start: _Point
+    end: _Point
+
+class _Door(TypedDict):
+    position: _Point
+    width: float
+    angle: float
+
+class _Window(TypedDict):
+    position: _Point
+    width: float
+    height: float
+
+class _Dimensions(TypedDict):
+    width: float
+    length: float
+
+class _FloorPlanSchema(TypedDict):
+    walls: List[_Wall]
+    doors: List[_Door]
+    windows: List[_Window]
+    dimensions: _Dimensions
+
+# Request config, prompt builder and parser below are shared with the batch
+# entry points in batch.py; treat the config as read-only
+FLOOR_PLAN_CONFIG = types.GenerateContentConfig(
+    response_mime_type="application/json",
+    response_schema=_FloorPlanSchema,
+    system_instruction=_FLOOR_PLAN_PREAMBLE,
+    thinking_config=types.ThinkingConfig(thinking_budget=256),
+)
+
+# Labels that describe the room's shell rather than its contents
+_ARCH_RE = re.compile(r"wall|door|window|floor")
+
+def _wall_row(wall: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    start, end = wall["start"], wall["end"]
+    return (start["x"], start["y"], end["x"], end["y"])
+
+def _door_row(door: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    position = door["position"]
+    return (position["x"], position["y"], door["width"], door["angle"])
+
+def _window_row(window: Dict[str, Any]) -> Tuple[float, float, float, float]:
+    position = window["position"]
+    return (position["x"], position["y"], window["width"], window["height"])
+
+def _geometry_array(items: Any, row) -> np.ndarray:
+    """Flatten floor-plan JSON elements into a float32 (N, 4) array.
+    
+    Elements missing a field or holding non-numeric values are dropped.
     """
-    Generate a 2D floor plan from a room image.
+    rows = []
+    for item in items or ():
+        try:
+            rows.append(tuple(map(float, row(item))))
+        except (KeyError, TypeError, ValueError):
+            continue
+    return np.array(rows, dtype=np.float32).reshape(-1, 4)
+
+def parse_floor_plan(text: Optional[str], parsed: Optional[Dict[str, Any]] = None) -> FloorPlan:
+    """Build a FloorPlan from a floor-plan response, dropping malformed elements.
     
     Args:
-        room_image: Photo of the room
-        recognized_objects: Optional pre-detected objects for context
+        text: Raw JSON response text
+        parsed: Schema-validated response.parsed, used instead of text when set
     
     Returns:
-        FloorPlan with walls, doors, windows, and dimensions
+        FloorPlan, or FloorPlan.empty() if the response isn't valid JSON
     """
-    context = ""
+    data = parsed
+    if data is None:
+        try:
+            data = _json_loads(text)
+        except (json.JSONDecodeError, TypeError):
+            logger.error("Failed to parse floor plan: %s", text)
+            return FloorPlan.empty()
+    
+    return FloorPlan(
+        walls=_geometry_array(data.get("walls"), _wall_row),
+        doors=_geometry_array(data.get("doors"), _door_row),
+        windows=_geometry_array(data.get("windows"), _window_row),
+        dimensions=data.get("dimensions", {"width": 0, "length": 0}),
+    )
+
+def floor_plan_prompt(recognized_objects: Optional[List[RecognizedObject]]) -> str:
+    """Build the per-room part of the floor-plan prompt from detected features."""
     if recognized_objects:
-        architectural = [obj for obj in recognized_objects 
-                        if any(x in obj.label for x in ['wall', 'door', 'window', 'floor'])]
-        context = "Detected features: " + ", ".join(
+        architectural = [obj for obj in recognized_objects if _ARCH_RE.search(obj.label)]
+        return "Detected features: " + ", ".join(
             f"{obj.label} at ({obj.bounding_box.min_x:.2f}, {obj.bounding_box.min_y:.2f})"
             for obj in architectural
         )
+    return "Generate the floor plan for this room."
 
-    prompt = f"""You are an expert architect analyzing a room image to generate a 2D floor plan.
-
-{context}
-
-Based on this image, generate a floor plan as JSON:
-{{
-    "walls": [{{"start": {{"x": 0, "y": 0}}, "end": {{"x": 5, "y": 0}}}}, ...],
-    "doors": [{{"position": {{"x": 2, "y": 0}}, "width": 0.9, "angle": 90}}, ...],
-    "windows": [{{"position": {{"x": 3, "y": 0}}, "width": 1.2, "height": 1.5}}, ...],
-    "dimensions": {{"width": 5.0, "length": 4.0}}
-}}
-
-All measurements in meters. Return ONLY valid JSON."""
+@single_flight
+async def agenerate_floor_plan(
+    room_image: Image.Image,
+    recognized_objects: Optional[List[RecognizedObject]] = None,
+) -> FloorPlan:
+    """Async counterpart of generate_floor_plan()."""
+    prompt = floor_plan_prompt(recognized_objects)
 
-    response = client.models.generate_content(
+    room_part = await asyncio.to_thread(as_part, room_image)
+    response = await _agenerate(
         model=Models.PRO,
-        contents=[room_image, prompt],
-        config=types.GenerateContentConfig(
-            response_mime_type="application/json",
-            thinking_config=types.ThinkingConfig(thinking_budget=256),
-        ),
+        contents=[room_part, prompt],
+        config=FLOOR_PLAN_CONFIG,
     )
+    _log_cache_usage(response, "floor plan")
     
-    try:
-        data = json.loads(response.text)
-        return FloorPlan(
-            walls=data.get("walls", []),
-            doors=data.get("doors", []),
-            windows=data.get("windows", []),
-            dimensions=data.get("dimensions", {"width": 0, "length": 0}),
-        )
-    except json.JSONDecodeError:
-        print(f"Failed to parse floor plan: {response.text}")
-        return FloorPlan([], [], [], {"width": 0, "length": 0})
+    # response.parsed is already validated against _FloorPlanSchema; it is None
+    # only when the model's output didn't match, so fall back to lenient parsing
+    return parse_floor_plan(response.text, response.parsed)
+
+def generate_floor_plan(
+    room_image: Image.Image,
+    recognized_objects: Optional[List[RecognizedObject]] = None,
+) -> FloorPlan:
+    """
+    Generate a 2D floor plan from a room image.
+    
+    Args:
+        room_image: Photo of the room
+        recognized_objects: Optional pre-detected objects for context
+    
+    Returns:
+        FloorPlan with walls, doors, windows, and dimensions
+    """
+    return run_sync(agenerate_floor_plan(room_image, recognized_objects))
 
 # ============================================================================
 # Product Recommendations with Google Search
 # ============================================================================
 
-def get_product_recommendations(
-    room_analysis: RoomAnalysis,
-    budget: str = "medium",
-    style: Optional[str] = None,
-    priorities: Optional[List[str]] = None,
+class _RecommendationSchema(TypedDict):
+    name: str
+    brand: str
+    price_range: str
+    retailer: str
+    fit_rationale: str
+    search_query: str
+
+# Shared with batch.py like the floor-plan config; treat as read-only
+RECOMMENDATION_CONFIG = types.GenerateContentConfig(
+    response_modalities=["TEXT"],
+    tools=[{"google_search": {}}],
+    response_mime_type="application/json",
+    # Must be the builtin list[...]: the SDK only converts types.GenericAlias
+    # schemas, and typing.List[...] silently becomes an empty Schema
+    response_schema=list[_RecommendationSchema],
+    thinking_config=_LOW_THINKING,
+)
+
+_RECOMMENDATION_FIELDS = tuple(_RecommendationSchema.__annotations__)
+
+def parse_recommendations(
+    text: Optional[str],
+    parsed: Optional[List[Dict[str, str]]] = None,
 ) -> List[ProductRecommendation]:
-    """
-    Get furniture and decor recommendations using Google Search grounding.
+    """Build recommendations from a response, ignoring unexpected keys.
     
     Args:
-        room_analysis: Analysis from analyze_room()
-        budget: "low", "medium", "high", or "luxury"
-        style: Preferred style override
-        priorities: List of priorities (e.g., ["comfort", "durability"])
+        text: Raw JSON response text
+        parsed: Schema-validated response.parsed, used instead of text when set
     
     Returns:
-        List of product recommendations with real products
+        List of recommendations (empty if the response isn't valid JSON)
     """
-    budget_ranges = {
-        "low": "budget-friendly under $500",
-        "medium": "mid-range $500-2000",
-        "high": "premium $2000-5000",
-        "luxury": "luxury over $5000",
-    }
-    
-    prompt = f"""Based on this room analysis, recommend specific furniture and decor products.
+    data = parsed
+    if data is None:
+        try:
+            data = _json_loads(text)
+        except (json.JSONDecodeError, TypeError):
+            logger.error("Failed to parse recommendations: %s", text)
+            return []
+    
+    # Only the known fields are read, so a stray or missing key in either the
+    # validated or the raw items can't fail construction
+    return [
+        ProductRecommendation(**{key: item.get(key, "") for key in _RECOMMENDATION_FIELDS})
+        for item in data
+    ]
+
+_BUDGET_RANGES = {
+    "low": "budget-friendly under $500",
+    "medium": "mid-range $500-2000",
+    "high": "premium $2000-5000",
+    "luxury": "luxury over $5000",
+}
 
-Room Type: {room_analysis.room_type}
-Room Dimensions: {room_analysis.dimensions.estimated_width}m x {room_analysis.dimensions.estimated_length}m
-Style Recommendations: {', '.join(room_analysis.style_recommendations)}
-User Preferred Style: {style or 'Not specified'}
-Budget Range: {budget_ranges.get(budget, 'Not specified')}
-Priorities: {', '.join(priorities) if priorities else 'Not specified'}
+def recommendation_prompt(
+    room_analysis: RoomAnalysis,
+    budget: str,
+    style: Optional[str],
+    priorities: Optional[List[str]],
+) -> str:
+    """Build the product recommendation prompt for a room."""
+    # Fixed instructions and format first, room-specific values last, so
+    # requests share the longest possible cacheable prefix
+    return f"""Recommend specific furniture and decor products for the room analysis below.
 
 Search for REAL products currently available. Provide 5-8 recommendations as JSON array:
 [
@@ -1032,44 +2172,84 @@ Search for REAL products currently available. Provide 5-8 recommendations as JSO
     }}
 ]
 
-Return ONLY valid JSON array."""
+Return ONLY valid JSON array.
 
-    response = client.models.generate_content(
+Room Type: {room_analysis.room_type}
+Room Dimensions: {room_analysis.dimensions.estimated_width}m x {room_analysis.dimensions.estimated_length}m
+Style Recommendations: {', '.join(room_analysis.style_recommendations)}
+User Preferred Style: {style or 'Not specified'}
+Budget Range: {_BUDGET_RANGES.get(budget, 'Not specified')}
+Priorities: {', '.join(priorities) if priorities else 'Not specified'}"""
+
+@single_flight
+async def aget_product_recommendations(
+    room_analysis: RoomAnalysis,
+    budget: str = "medium",
+    style: Optional[str] = None,
+    priorities: Optional[List[str]] = None,
+) -> List[ProductRecommendation]:
+    """Async counterpart of get_product_recommendations()."""
+    prompt = recommendation_prompt(room_analysis, budget, style, priorities)
+
+    response = await _agenerate(
         model=Models.NANO_BANANA_PRO,
         contents=[prompt],
-        config=types.GenerateContentConfig(
-            response_modalities=["TEXT"],
-            tools=[{"google_search": {}}],
-            response_mime_type="application/json",
-        ),
+        config=RECOMMENDATION_CONFIG,
     )
     
-    try:
-        data = json.loads(response.text)
-        return [
-            ProductRecommendation(
-                name=item.get("name", ""),
-                brand=item.get("brand", ""),
-                price_range=item.get("price_range", ""),
-                retailer=item.get("retailer", ""),
-                fit_rationale=item.get("fit_rationale", ""),
-                search_query=item.get("search_query", ""),
-            )
-            for item in data
-        ]
-    except json.JSONDecodeError:
-        print(f"Failed to parse recommendations: {response.text}")
-        return []
+    return parse_recommendations(response.text, response.parsed)
+
+def get_product_recommendations(
+    room_analysis: RoomAnalysis,
+    budget: str = "medium",
+    style: Optional[str] = None,
+    priorities: Optional[List[str]] = None,
+) -> List[ProductRecommendation]:
+    """
+    Get furniture and decor recommendations using Google Search grounding.
+    
+    Args:
+        room_analysis: Analysis from analyze_room()
+        budget: "low", "medium", "high", or "luxury"
+        style: Preferred style override
+        priorities: List of priorities (e.g., ["comfort", "durability"])
+    
+    Returns:
+        List of product recommendations with real products
+    """
+    return run_sync(aget_product_recommendations(room_analysis, budget, style, priorities))
 
 # ============================================================================
 # Grounded Image Generation (with Google Search)
 # ============================================================================
 
+@single_flight
+async def agenerate_grounded_image(
+    prompt: str,
+    aspect_ratio: str = "16:9",
+    resolution: str = "2K",
+) -> Tuple[Optional[LazyImage], str, List[str]]:
+    """Async counterpart of generate_grounded_image()."""
+    result_image, description, last_chunk = await _astream_image(
+        model=Models.NANO_BANANA_PRO,
+        contents=[prompt],
+        config=_img_gen_config(aspect_ratio, resolution, search=True, low_thinking=True),
+    )
+    search_queries = []
+    
+    # Grounding metadata arrives with the final chunk of the stream
+    if last_chunk and last_chunk.candidates and last_chunk.candidates[0].grounding_metadata:
+        meta = last_chunk.candidates[0].grounding_metadata
+        if hasattr(meta, 'web_search_queries'):
+            search_queries = meta.web_search_queries or []
+    
+    return result_image, description, search_queries
+
 def generate_grounded_image(
     prompt: str,
     aspect_ratio: str = "16:9",
     resolution: str = "2K",
-) -> Tuple[Optional[Image.Image], str, List[str]]:
+) -> Tuple[Optional[LazyImage], str, List[str]]:
     """
     Generate an image using Google Search for real-time information.
     
@@ -1086,48 +2266,37 @@ def generate_grounded_image(
     Returns:
         Tuple of (image, description, search_queries used)
     """
-    response = client.models.generate_content(
-        model=Models.NANO_BANANA_PRO,
-        contents=[prompt],
-        config=types.GenerateContentConfig(
-            response_modalities=["TEXT", "IMAGE"],
-            image_config=types.ImageConfig(
-                aspect_ratio=aspect_ratio,
-                image_size=resolution,
-            ),
-            tools=[{"google_search": {}}],
-        ),
-    )
-    
-    result_image = None
-    description = ""
-    search_queries = []
-    
-    for part in response.parts:
-        if hasattr(part, 'thought') and part.thought:
-            continue
-        if part.text is not None:
-            description = part.text
-        elif part.inline_data is not None:
-            result_image = part.as_image()
-    
-    # Extract search queries from grounding metadata if available
-    if response.candidates and response.candidates[0].grounding_metadata:
-        meta = response.candidates[0].grounding_metadata
-        if hasattr(meta, 'web_search_queries'):
-            search_queries = meta.web_search_queries or []
-    
-    return result_image, description, search_queries
+    return run_sync(agenerate_grounded_image(prompt, aspect_ratio, resolution))
 
 # ============================================================================
 # High-Resolution Output (4K)
 # ============================================================================
 
+@single_flight
+async def agenerate_4k_image(
+    prompt: str,
+    aspect_ratio: str = "16:9",
+    input_image: Optional[Image.Image] = None,
+) -> Tuple[Optional[LazyImage], str]:
+    """Async counterpart of generate_4k_image()."""
+    if input_image:
+        contents = [await asyncio.to_thread(as_part, input_image), prompt]
+    else:
+        contents = [prompt]
+    
+    image, description, _ = await _astream_image(
+        model=Models.NANO_BANANA_PRO,
+        contents=contents,
+        config=_img_gen_config(aspect_ratio, "4K", low_thinking=True),
+    )
+    
+    return image, description
+
 def generate_4k_image(
     prompt: str,
     aspect_ratio: str = "16:9",
     input_image: Optional[Image.Image] = None,
-) -> Tuple[Optional[Image.Image], str]:
+) -> Tuple[Optional[LazyImage], str]:
     """
     Generate a 4K resolution image (Nano Banana Pro only).
     
@@ -1139,89 +2308,132 @@ def generate_4k_image(
     Returns:
         Tuple of (4K image, description)
     """
-    contents = [input_image, prompt] if input_image else [prompt]
-    
-    response = client.models.generate_content(
-        model=Models.NANO_BANANA_PRO,
-        contents=contents,
-        config=types.GenerateContentConfig(
-            response_modalities=["TEXT", "IMAGE"],
-            image_config=types.ImageConfig(
-                aspect_ratio=aspect_ratio,
-                image_size="4K",
-            ),
-        ),
-    )
-    
-    result_image = None
-    description = ""
-    
-    for part in response.parts:
-        if hasattr(part, 'thought') and part.thought:
-            continue
-        if part.text is not None:
-            description = part.text
-        elif part.inline_data is not None:
-            result_image = part.as_image()
-    
-    return result_image, description
+    return run_sync(agenerate_4k_image(prompt, aspect_ratio, input_image))
 
 # ============================================================================
 # Examples / Demo
 # ============================================================================
 
-def run_examples():
-    """Run example demonstrations of all features."""
-    img, desc = generate_image("modern kitchen with marble counters")
-    img.save("kitchen.png")
+async def _image_writer(queue: asyncio.Queue):
+    """Save queued (path, image) pairs off the event loop until a None arrives.
+    
+    Demo output is throwaway, so PIL images use the fastest PNG deflate level.
+    """
+    while True:
+        item = await queue.get()
+        if item is None:
+            return
+        path, image = item
+        try:
+            await asyncio.to_thread(save_image, image, path, compress_level=1)
+        except Exception as e:
+            # One bad item (unwritable path, unknown extension, ...) must not
+            # stop the writer and drop the saves queued behind it
+            logger.error("Failed to save %s: %s", path, e)
 
-    room = load_image("pics/demo_text_to_image.png")
-    styled, _ = generate_room_style(room, "scandinavian minimalist with natural wood and white walls")
-    styled.save("styled_room.png")
+# Smallest useful request: route to the model and prefill the prompt prefix
+_WARMUP_CONFIG = types.GenerateContentConfig(response_modalities=["TEXT"], max_output_tokens=1)
 
-    session = RoomEditingSession()
+async def _awarm_models():
+    """Prime the demo's models and the texture preamble with 1-token requests.
+    
+    Also exercises the API key and network path before the real work starts.
+    Failures are only logged; the real requests will report them properly.
+    """
+    texture_config = _WARMUP_CONFIG.model_copy(update={
+        "thinking_config": _LOW_THINKING,
+        "system_instruction": _TEXTURE_PREAMBLE,
+    })
+    results = await asyncio.gather(
+        _agenerate_once(model=Models.NANO_BANANA, contents=["ping"], config=_WARMUP_CONFIG),
+        _agenerate_once(model=Models.NANO_BANANA_PRO, contents=["ping"], config=texture_config),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning("Model warm-up failed: %s", result)
 
-    # Multi-turn editing session
-    session = RoomEditingSession()
-    img1, _ = session.edit(room, "Transform to industrial loft style")
-    print(f"✓ Generated image saved to styled_room.png: {img1} {_}")
-    img2, _ = session.edit(None, "Add exposed brick on the main wall")
-    print(f"✓ Generated image saved to styled_room.png: {img2} {_}")
-    img3, _ = session.edit(None, "Make the lighting warmer")
-    print(f"✓ Generated image saved to styled_room.png: {img3} {_}")
+async def arun_examples():
+    """Run example demonstrations of all features."""
+    # Fire-and-forget; awaited at the end only so it isn't left pending
+    warmup = asyncio.create_task(_awarm_models())
+    
+    # Saves run on a writer task so encoding and disk writes overlap the
+    # next Gemini request instead of stalling it
+    save_queue: asyncio.Queue = asyncio.Queue()
+    writer = asyncio.create_task(_image_writer(save_queue))
+    
+    try:
+        img, desc = await agenerate_image("modern kitchen with marble counters")
+        if img:
+            save_queue.put_nowait(("kitchen.png", img))
 
-    print("=" * 60)
-    print("Gemini AI - Nano Banana Feature Demos")
-    print("=" * 60)
+        room = load_image("pics/demo_text_to_image.png")
+        styled, _ = await asyncio.to_thread(
+            generate_room_style, room, "scandinavian minimalist with natural wood and white walls"
+        )
+        if styled:
+            save_queue.put_nowait(("styled_room.png", styled))
+
+        # Multi-turn editing session
+        session = RoomEditingSession()
+        img1, _ = await session.aedit(room, "Transform to industrial loft style")
+        print(f"✓ Generated image saved to styled_room.png: {img1} {_}")
+        img2, _ = await session.aedit(None, "Add exposed brick on the main wall")
+        print(f"✓ Generated image saved to styled_room.png: {img2} {_}")
+        img3, _ = await session.aedit(None, "Make the lighting warmer")
+        print(f"✓ Generated image saved to styled_room.png: {img3} {_}")
+
+        print("=" * 60)
+        print("Gemini AI - Nano Banana Feature Demos")
+        print("=" * 60)
+        
+        # The three demos below are independent, so request them all at once
+        (image, desc), texture, (grounded_img, grounded_desc, queries) = await asyncio.gather(
+            agenerate_image(
+                "A modern minimalist living room with floor-to-ceiling windows, "
+                "a white sectional sofa, and indoor plants. Natural daylight."
+            ),
+            agenerate_seamless_texture("light oak hardwood flooring with natural grain"),
+            agenerate_grounded_image(
+                "Create a stylish infographic showing today's weather forecast for San Francisco"
+            ),
+        )
+        
+        for path, result in (
+            ("demo_text_to_image.png", image),
+            ("demo_texture.png", texture),
+            ("demo_grounded.png", grounded_img),
+        ):
+            if result:
+                save_queue.put_nowait((path, result))
+    except BaseException:
+        # Don't keep warming models for a demo that already failed
+        warmup.cancel()
+        raise
+    finally:
+        # Flush what was queued and leave no task pending on the loop, which
+        # outlives this call when run through run_sync()
+        save_queue.put_nowait(None)
+        await asyncio.gather(writer, warmup, return_exceptions=True)
     
     # 1. Text-to-Image Generation
     print("\n1. Text-to-Image Generation")
     print("-" * 40)
-    image, desc = generate_image(
-        "A modern minimalist living room with floor-to-ceiling windows, "
-        "a white sectional sofa, and indoor plants. Natural daylight."
-    )
     if image:
-        image.save("demo_text_to_image.png")
         print(f"✓ Generated image saved to demo_text_to_image.png")
         print(f"  Description: {desc[:100]}...")
     
     # 2. Seamless Texture
     print("\n2. Seamless Texture Generation")
     print("-" * 40)
-    texture = generate_seamless_texture("light oak hardwood flooring with natural grain")
     if texture:
-        texture.save("demo_texture.png")
         print("✓ Generated texture saved to demo_texture.png")
     
     # 3. Grounded Image (with search)
     print("\n3. Grounded Image Generation (with Google Search)")
     print("-" * 40)
-    grounded_img, grounded_desc, queries = generate_grounded_image(
-        "Create a stylish infographic showing today's weather forecast for San Francisco"
-    )
     if grounded_img:
-        grounded_img.save("demo_grounded.png")
         print(f"✓ Generated grounded image saved to demo_grounded.png")
         print(f"  Search queries used: {queries}")
     
@@ -1229,6 +2441,10 @@ def run_examples():
     print("Demo complete! Check the generated files.")
     print("=" * 60)
 
+def run_examples():
+    """Run example demonstrations of all features."""
+    run_sync(arun_examples())
+
 # ============================================================================
 # Main
 # ============================================================================
@@ -1,7 +1,6 @@
-from google import genai 
 from google.genai import types 
 
-client = genai.Client()
+from _client import client
 
 # Send the room scan image 
 response = client.models.generate_content(
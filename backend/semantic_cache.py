@@ -0,0 +1,361 @@
+"""
+semantic_cache.py - Embedding-based response cache for AR Designer Kit
+
+Generation prompts are often re-issued verbatim or as close paraphrases
+("light oak hardwood flooring" vs. "light oak hardwood floor"). This module
+embeds the prompt, looks for a stored response whose prompt embedding has a
+cosine similarity above a threshold, and returns it without a generation call.
+
+Entries are persisted in a SQLite database with the response payload written
+next to it on disk; embeddings for each cache scope are kept in memory as a
+normalized matrix so a lookup is a single matrix-vector product. Each store
+deletes the scope's expired entries and, once the payloads exceed the size
+cap, the oldest entries overall.
+
+Usage:
+    from semantic_cache import semantic_cache, Codec
+
+    @semantic_cache(embed=aembed, codec=IMAGE_CODEC, prompt_arg="material_description")
+    async def agenerate_seamless_texture(material_description, resolution="2K"):
+        ...
+
+Environment:
+    AR_DESIGNER_CACHE_DIR: Cache location (default: ~/.cache/ar_designer_kit)
+    AR_DESIGNER_SEMANTIC_CACHE: Set to "1" to enable the cache (off by default:
+        every call then pays an embedding request, and results are written
+        to disk)
+    AR_DESIGNER_CACHE_MAX_MB: Size cap for stored payloads (default: 512)
+"""
+
+from dataclasses import dataclass
+from functools import wraps
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import inspect
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+CACHE_DIR = os.environ.get(
+    "AR_DESIGNER_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "ar_designer_kit"),
+)
+ENABLED = os.environ.get("AR_DESIGNER_SEMANTIC_CACHE", "0") == "1"
+MAX_BYTES = int(float(os.environ.get("AR_DESIGNER_CACHE_MAX_MB", "512")) * 1024 * 1024)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+def normalize_prompt(prompt: str) -> str:
+    """Lower-case and collapse whitespace so trivial edits embed identically."""
+    return _WHITESPACE_RE.sub(" ", prompt).strip().lower()
+
+# ============================================================================
+# Codecs
+# ============================================================================
+
+@dataclass(slots=True, frozen=True)
+class Codec:
+    """How a cached function's return value is written to and read from disk.
+
+    Attributes:
+        dump: (result, base_path) -> (response_path, metadata), or None to
+            skip caching this result (e.g. no image was generated)
+        load: (response_path, metadata) -> result
+    """
+    dump: Callable[[Any, str], Optional[Tuple[str, Dict[str, Any]]]]
+    load: Callable[[str, Dict[str, Any]], Any]
+
+def _dump_json(result: Any, base_path: str) -> Tuple[str, Dict[str, Any]]:
+    path = base_path + ".json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(result, f)
+    return path, {}
+
+def _load_json(path: str, metadata: Dict[str, Any]) -> Any:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+JSON_CODEC = Codec(_dump_json, _load_json)
+
+# ============================================================================
+# Store
+# ============================================================================
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    fn_name TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    response_path TEXT NOT NULL,
+    metadata TEXT NOT NULL,
+    created_ts REAL NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS responses_fn_name ON responses (fn_name, created_ts);
+CREATE INDEX IF NOT EXISTS responses_created_ts ON responses (created_ts);
+"""
+
+def _empty_index() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return (
+        np.empty(0, dtype=np.int64),
+        np.empty(0, dtype=np.float64),
+        np.empty((0, 0), dtype=np.float32),
+    )
+
+class SemanticCache:
+    """SQLite-backed store with an in-memory cosine-similarity index per scope.
+
+    A scope is the cached function's name plus every argument other than the
+    prompt, so e.g. a 2K and a 4K texture for the same material never match.
+    """
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = MAX_BYTES):
+        self.directory = directory
+        self.response_dir = os.path.join(directory, "responses")
+        self.max_bytes = max_bytes
+        os.makedirs(self.response_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(
+            os.path.join(directory, "semantic_cache.sqlite3"),
+            check_same_thread=False,
+        )
+        columns = {row[1] for row in self._db.execute("PRAGMA table_info(responses)")}
+        if columns and "size" not in columns:
+            # Databases from before the size cap: their payloads count as 0 bytes
+            self._db.execute("ALTER TABLE responses ADD COLUMN size INTEGER NOT NULL DEFAULT 0")
+        self._db.executescript(_SCHEMA)
+        # scope -> (row ids, created timestamps, (N, D) unit embeddings)
+        self._index: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+
+    def _scope_index(self, scope: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Load a scope's embeddings from SQLite on first use (lock held)."""
+        index = self._index.get(scope)
+        if index is None:
+            rows = self._db.execute(
+                "SELECT id, created_ts, embedding FROM responses WHERE fn_name = ?",
+                (scope,),
+            ).fetchall()
+            if rows:
+                index = (
+                    np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows)),
+                    np.fromiter((r[1] for r in rows), dtype=np.float64, count=len(rows)),
+                    np.stack([np.frombuffer(r[2], dtype=np.float32) for r in rows]),
+                )
+            else:
+                index = _empty_index()
+            self._index[scope] = index
+        return index
+
+    def lookup(
+        self,
+        scope: str,
+        embedding: np.ndarray,
+        threshold: float,
+        ttl: float,
+    ) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """Find the most similar live entry above the threshold.
+
+        Args:
+            scope: Cache scope (function name and non-prompt arguments)
+            embedding: Unit-normalized float32 prompt embedding
+            threshold: Minimum cosine similarity for a hit
+            ttl: Maximum entry age in seconds
+
+        Returns:
+            (response_path, metadata) for a hit, or None
+        """
+        with self._lock:
+            ids, created, matrix = self._scope_index(scope)
+            if not len(ids) or matrix.shape[1] != embedding.shape[0]:
+                return None
+
+            scores = matrix @ embedding
+            scores[created < time.time() - ttl] = -1.0
+            best = int(np.argmax(scores))
+            if scores[best] < threshold:
+                return None
+
+            row = self._db.execute(
+                "SELECT response_path, metadata FROM responses WHERE id = ?",
+                (int(ids[best]),),
+            ).fetchone()
+
+        if row is None or not os.path.exists(row[0]):
+            return None
+        return row[0], json.loads(row[1])
+
+    def store(
+        self,
+        scope: str,
+        embedding: np.ndarray,
+        response_path: str,
+        metadata: Dict[str, Any],
+        ttl: float,
+    ):
+        """Record a response written to response_path under its prompt embedding.
+
+        Also deletes the scope's entries older than ttl and, if the cache is
+        over max_bytes, the oldest entries of any scope.
+        """
+        created = time.time()
+        size = os.path.getsize(response_path)
+        with self._lock:
+            cursor = self._db.execute(
+                "INSERT INTO responses "
+                "(fn_name, embedding, response_path, metadata, created_ts, size) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (scope, embedding.tobytes(), response_path, json.dumps(metadata), created, size),
+            )
+
+            ids, timestamps, matrix = self._scope_index(scope)
+            if matrix.shape[1] != embedding.shape[0]:
+                # Empty scope, or the embedding model changed: start it over
+                ids, timestamps, matrix = _empty_index()
+                matrix = matrix.reshape(0, embedding.shape[0])
+            self._index[scope] = (
+                np.append(ids, cursor.lastrowid),
+                np.append(timestamps, created),
+                np.vstack([matrix, embedding]),
+            )
+
+            expired = self._db.execute(
+                "SELECT id, fn_name, response_path FROM responses "
+                "WHERE fn_name = ? AND created_ts < ?",
+                (scope, created - ttl),
+            ).fetchall()
+            self._evict(expired + self._over_size_cap())
+            self._db.commit()
+
+    def _over_size_cap(self) -> List[Tuple[int, str, str]]:
+        """Return the oldest entries that must go to fit max_bytes (lock held)."""
+        (total,) = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+        excess = total - self.max_bytes
+        evict = []
+        if excess > 0:
+            rows = self._db.execute(
+                "SELECT id, fn_name, response_path, size FROM responses ORDER BY created_ts"
+            )
+            for row_id, scope, path, size in rows:
+                evict.append((row_id, scope, path))
+                excess -= size
+                if excess <= 0:
+                    break
+        return evict
+
+    def _evict(self, rows: List[Tuple[int, str, str]]):
+        """Delete entries' rows, payload files and index rows (lock held)."""
+        if not rows:
+            return
+        self._db.executemany("DELETE FROM responses WHERE id = ?", [(row[0],) for row in rows])
+
+        by_scope: Dict[str, List[int]] = {}
+        for row_id, scope, path in rows:
+            by_scope.setdefault(scope, []).append(row_id)
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        for scope, row_ids in by_scope.items():
+            index = self._index.get(scope)
+            if index is not None:
+                keep = ~np.isin(index[0], row_ids)
+                self._index[scope] = tuple(column[keep] for column in index)
+
+    def new_base_path(self) -> str:
+        """Return a fresh path (without extension) for a response payload."""
+        return os.path.join(self.response_dir, uuid.uuid4().hex)
+
+_default_cache: Optional[SemanticCache] = None
+_default_cache_lock = threading.Lock()
+
+def get_cache() -> SemanticCache:
+    """Return the process-wide cache, creating CACHE_DIR on first use."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = SemanticCache()
+        return _default_cache
+
+# ============================================================================
+# Decorator
+# ============================================================================
+
+def semantic_cache(
+    embed: Callable[[str], Awaitable[np.ndarray]],
+    codec: Codec = JSON_CODEC,
+    threshold: float = 0.92,
+    ttl: float = 3600,
+    prompt_arg: str = "prompt",
+):
+    """Cache an async function's results by prompt similarity.
+
+    The prompt argument is normalized and embedded once per call; all other
+    arguments must match exactly (they form the cache scope). Embedding or
+    storage failures never fail the call, they only skip the cache. Unless
+    AR_DESIGNER_SEMANTIC_CACHE=1 is set, the function is called directly.
+
+    Args:
+        embed: Async function returning the embedding of a prompt string
+        codec: How results are persisted (default: JSON)
+        threshold: Minimum cosine similarity for a cache hit
+        ttl: Maximum age of a cached entry in seconds
+        prompt_arg: Name of the parameter holding the prompt text
+
+    Returns:
+        Decorator for an async function
+    """
+    def decorator(fn):
+        signature = inspect.signature(fn)
+
+        @wraps(fn)
+        async def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return await fn(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = dict(bound.arguments)
+            prompt = normalize_prompt(arguments.pop(prompt_arg))
+            scope = f"{fn.__qualname__}{sorted(arguments.items())!r}"
+
+            try:
+                # First use opens SQLite, and lookups share the lock that
+                # stores hold while writing, so neither runs on the event loop
+                cache = await asyncio.to_thread(get_cache)
+                embedding = np.asarray(await embed(prompt), dtype=np.float32)
+                embedding /= np.linalg.norm(embedding) or 1.0
+                hit = await asyncio.to_thread(cache.lookup, scope, embedding, threshold, ttl)
+                if hit is not None:
+                    logger.debug("Semantic cache hit for %s", fn.__qualname__)
+                    return await asyncio.to_thread(codec.load, *hit)
+            except Exception as e:
+                logger.warning("Semantic cache lookup failed for %s: %s", fn.__qualname__, e)
+                return await fn(*args, **kwargs)
+
+            result = await fn(*args, **kwargs)
+
+            def persist():
+                dumped = codec.dump(result, cache.new_base_path())
+                if dumped is not None:
+                    cache.store(scope, embedding, *dumped, ttl=ttl)
+
+            try:
+                await asyncio.to_thread(persist)
+            except Exception as e:
+                logger.warning("Semantic cache store failed for %s: %s", fn.__qualname__, e)
+
+            return result
+
+        return wrapper
+    return decorator
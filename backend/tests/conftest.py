@@ -0,0 +1,14 @@
+"""
+Shared test setup: import the backend modules offline.
+
+The client reads GEMINI_API_KEY at import, and the semantic cache would embed
+prompts through the network, so both are set up before any test imports them.
+"""
+
+import os
+import sys
+
+os.environ.setdefault("GEMINI_API_KEY", "test-key")
+os.environ["AR_DESIGNER_SEMANTIC_CACHE"] = "0"
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,25 @@
+"""
+Image utility tests (encoding, the pooled encode buffer).
+"""
+
+from io import BytesIO
+
+from PIL import Image
+import pytest
+
+import nano_fun
+
+@pytest.mark.parametrize("fmt", ["ICO", "PDF", "PNG", "JPEG"])
+def test_image_to_bytes_after_larger_encode(fmt):
+    small = Image.new("RGB", (16, 16), "red")
+    fresh = BytesIO()
+    small.save(fresh, format=fmt)
+
+    # Leave a larger payload in this thread's pooled buffer first
+    nano_fun.image_to_bytes(Image.new("RGB", (256, 256), "blue"))
+
+    data = nano_fun.image_to_bytes(small, fmt)
+    # PDFs embed a timestamp, so compare sizes rather than bytes
+    assert len(data) == len(fresh.getvalue())
+    if fmt != "PDF":
+        assert Image.open(BytesIO(data)).size == (16, 16)
@@ -0,0 +1,103 @@
+"""
+Request-building tests for the structured-output (response_schema) calls.
+
+The HTTP transport is replaced with a stub, so each request runs the SDK's
+full config conversion (where an unsupported schema type raises) without
+touching the network.
+"""
+
+import asyncio
+import json
+
+from google.genai import _api_client, types
+import numpy as np
+import pytest
+
+import batch
+import nano_fun
+
+ROOM = nano_fun.RoomAnalysis(
+    room_type="living room",
+    dimensions=nano_fun.RoomDimensions(4.0, 5.0, 2.5),
+    lighting_suggestions=[],
+    style_recommendations=["modern"],
+    detected_features=[],
+)
+
+RECOMMENDATION = {
+    "name": "Sofa",
+    "brand": "Brand",
+    "price_range": "$500 - $800",
+    "retailer": "Store",
+    "fit_rationale": "Fits the space",
+    "search_query": "grey sofa",
+}
+
+FLOOR_PLAN = {
+    "walls": [{"start": {"x": 0, "y": 0}, "end": {"x": 3, "y": 4}}],
+    "doors": [{"position": {"x": 1, "y": 0}, "width": 0.9, "angle": 90}],
+    "windows": [],
+    "dimensions": {"width": 3.0, "length": 4.0},
+}
+
+@pytest.fixture
+def stub_transport(monkeypatch):
+    """Answer every async request with the JSON in replies[0]; record requests."""
+    requests = []
+    replies = []
+
+    async def async_request(self, http_method, path, request_dict, http_options=None):
+        requests.append(request_dict)
+        text = json.dumps(replies[0])
+        body = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}}]}
+        return types.HttpResponse(headers={}, body=json.dumps(body))
+
+    monkeypatch.setattr(_api_client.BaseApiClient, "async_request", async_request)
+    return requests, replies
+
+def test_product_recommendations_request(stub_transport):
+    requests, replies = stub_transport
+    replies.append([RECOMMENDATION])
+
+    recommendations = nano_fun.get_product_recommendations(ROOM)
+
+    assert recommendations == [nano_fun.ProductRecommendation(**RECOMMENDATION)]
+    schema = requests[0]["generationConfig"]["responseSchema"]
+    assert schema["type"] == "ARRAY"
+    assert set(schema["items"]["properties"]) == set(RECOMMENDATION)
+
+def test_product_recommendations_tolerate_stray_and_missing_keys(stub_transport):
+    _, replies = stub_transport
+    item = dict(RECOMMENDATION, rating="5 stars")
+    del item["retailer"]
+    replies.append([item])
+
+    (recommendation,) = nano_fun.get_product_recommendations(ROOM)
+
+    assert recommendation.name == "Sofa"
+    assert recommendation.retailer == ""
+
+def test_floor_plan_request(stub_transport):
+    requests, replies = stub_transport
+    replies.append(FLOOR_PLAN)
+
+    plan = nano_fun.generate_floor_plan(nano_fun.Image.new("RGB", (8, 8)))
+
+    np.testing.assert_allclose(plan.wall_lengths(), [5.0])
+    assert plan.doors.shape == (1, 4)
+    assert requests[0]["generationConfig"]["responseSchema"]["type"] == "OBJECT"
+
+def test_batch_requests_carry_json_schemas():
+    recommendation = asyncio.run(batch._recommendation_request(ROOM))
+    floor_plan = asyncio.run(batch._floor_plan_request(nano_fun.Image.new("RGB", (8, 8))))
+
+    schema = recommendation["generationConfig"]["responseJsonSchema"]
+    assert schema["type"] == "array"
+    assert floor_plan["generationConfig"]["responseJsonSchema"]["type"] == "object"
+    assert "systemInstruction" in floor_plan
+
+def test_parsed_floor_plans_compare_by_value():
+    text = json.dumps(FLOOR_PLAN)
+
+    assert nano_fun.parse_floor_plan(text) == nano_fun.parse_floor_plan(text)
+    assert nano_fun.parse_floor_plan(text) != nano_fun.FloorPlan.empty()